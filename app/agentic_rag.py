@@ -1,14 +1,29 @@
 # app/agentic_rag.py
+import asyncio
 import json
 import re
-from typing import Dict, Any, List, Tuple
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from app.llm import llm_functions as llm
 from app.db_functions import get_similar_results
+from app.answer_cache import get_answer_cache
 
 
 # ---------- Utilities ----------
 
+async def _search(query: str, embedding: List[float], top_k: int) -> List[Dict[str, str]]:
+    """
+    The pgvector search is a blocking psycopg2 call; run it on the default
+    executor so concurrent chat sessions keep sharing the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, partial(get_similar_results.search_similar_summaries, query, embedding, top_k=top_k)
+    )
+
+
 def _extract_json(text: str) -> Dict[str, Any]:
     """
     Robustly extract JSON from LLM output.
@@ -40,6 +55,62 @@ def _maybe_extract_company(query: str) -> str:
     return m.group(1) if m else ""
 
 
+KNOWN_COMPANIES_TTL = 60.0  # seconds
+_known_companies: Tuple[float, List[str]] = (0.0, [])
+
+
+def _load_known_companies() -> List[str]:
+    """
+    Ingested company names (lowercase), refreshed at most every
+    KNOWN_COMPANIES_TTL seconds. Blocking DB call; run it off the event loop.
+    """
+    global _known_companies
+    loaded_at, names = _known_companies
+    if time.monotonic() - loaded_at < KNOWN_COMPANIES_TTL:
+        return names
+    try:
+        from app.db_functions.company_crud import list_companies
+        names = [row[0].lower() for row in list_companies()]
+    except Exception as e:
+        print(f"⚠️ Could not load known companies: {e!r}")
+    _known_companies = (time.monotonic(), names)
+    return names
+
+
+def _resolve_company(query: str, companies: List[str]) -> str:
+    """
+    The longest known company whose words appear as whole words in the query,
+    or "" (the global answer-cache scope) when none does.
+    """
+    query_words = " " + " ".join(re.findall(r"[a-z0-9]+", query.lower())) + " "
+    matches = [
+        c for c in companies
+        if f" {' '.join(re.findall(r'[a-z0-9]+', c))} " in query_words
+    ]
+    return max(matches, key=len) if matches else ""
+
+
+async def _cache_scope(query: str) -> str:
+    loop = asyncio.get_running_loop()
+    companies = await loop.run_in_executor(None, _load_known_companies)
+    return _resolve_company(query, companies)
+
+
+async def _ingest_version(company: str) -> Optional[float]:
+    """
+    The scope's ingest version from the database, so an ingest run by another
+    process invalidates this process's cached answers. None if unavailable.
+    """
+    from app.db_functions.company_crud import ingest_version
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, ingest_version, company)
+    except Exception as e:
+        print(f"⚠️ Could not read ingest version for {company or 'all companies'}: {e!r}")
+        return None
+
+
 def _build_answer_prompt(user_query: str, chunks: List[Dict[str, str]]) -> str:
     """
     Builds a professional, broad answer prompt with company constraint if present.
@@ -74,18 +145,53 @@ If the chunks disagree, explain the discrepancy briefly and choose the most reas
 """
 
 
-async def _retrieve_and_answer(query: str, top_k: int = 6) -> Tuple[str, List[Dict[str, str]]]:
+async def _retrieve(query: str, top_k: int = 6) -> List[Dict[str, str]]:
     """
-    One retrieval + answer pass.
-    - Hybrid retrieval (your db layer handles using both query text and embeddings)
-    - Compose a strong answer prompt and call the LLM
+    Hybrid retrieval (your db layer handles using both query text and embeddings)
     """
-    embedding = await llm.create_embeddings(query)
-    chunks = get_similar_results.search_similar_summaries(query, embedding, top_k=top_k)
+    embedding = await llm.create_query_embedding(query)
+    return await _search(query, embedding, top_k)
+
 
+async def _answer(query: str, chunks: List[Dict[str, str]]) -> str:
     prompt = _build_answer_prompt(query, chunks)
-    answer = llm.generate_answer_with_context(prompt, chunks)
-    return answer, chunks
+    return await llm.async_generate_answer_with_context(prompt, chunks)
+
+
+def _fallback_query(user_query: str, status: str) -> str:
+    """
+    Templated follow-up query used when the judge says "refine" without
+    proposing one, or says "fail". Depends only on the user query, so
+    speculative mode can retrieve for it up front.
+    """
+    company = _maybe_extract_company(user_query)
+    company_hint = f" company:{company}" if company else ""
+    if status == "refine":
+        return f"{user_query}{company_hint} interview experience interview process onsite rounds behavioral system design DSA coding"
+    return f"{user_query}{company_hint} interview experience role responsibilities questions preparation tips"
+
+
+def _merge_chunks(*chunk_lists: List[Dict[str, str]], top_k: int, rrf_k: int = 60) -> List[Dict[str, str]]:
+    """
+    Union of several result lists, one chunk per link, capped at `top_k`.
+    Scores from different queries (or search modes) are not comparable, so
+    lists are fused by rank with reciprocal rank fusion: 1 / (rrf_k + rank).
+    """
+    fused: Dict[str, float] = {}
+    best: Dict[str, Dict[str, str]] = {}
+    for chunks in chunk_lists:
+        rank = 0
+        seen = set()
+        for c in chunks:
+            link = c.get("link", "")
+            if link in seen:
+                continue  # only a link's first (best) chunk in each list counts
+            seen.add(link)
+            rank += 1
+            fused[link] = fused.get(link, 0.0) + 1.0 / (rrf_k + rank)
+            best.setdefault(link, c)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [best[link] for link in ranked]
 
 
 async def _judge_answer(user_query: str, answer: str, chunks: List[Dict[str, str]]) -> Dict[str, Any]:
@@ -136,79 +242,190 @@ Respond ONLY in strict JSON:
   "reason": "1-2 sentence explanation"
 }}
 """
-    raw = llm.generate_answer_with_context(judge_prompt, [])
+    raw = await llm.async_generate_answer_with_context(judge_prompt, [])
     return _extract_json(raw)
 
 
 # ---------- Public API ----------
 
+async def _agentic_events(
+    user_query: str,
+    max_loops: int,
+    top_k: int,
+    use_cache: bool,
+    stream: bool,
+    speculative: bool
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    The agentic loop as a stream of events:
+      {"type": "token", "text"}      a piece of the first answer (stream=True only)
+      {"type": "status", "text"}     progress note (judging, refining)
+      {"type": "judge", "attempt", "decision"}
+      {"type": "final", "answer", "debug"}   always last
+    """
+    start = time.perf_counter()
+    cache = get_answer_cache()
+    query_embedding = None
+    cache_company = ""
+    cache_version = None
+    if use_cache:
+        # Scoped to an ingested company so a re-ingest can invalidate it
+        cache_company = await _cache_scope(user_query)
+        cache_version = await _ingest_version(cache_company)
+        query_embedding = await llm.create_query_embedding(user_query)
+        cached = cache.lookup(cache_company, query_embedding, cache_version)
+        if cached:
+            answer, debug, match = cached
+            debug.pop("ttft_ms", None)  # belongs to the run that produced the answer
+            debug["cache"] = {"hit": True, **match,
+                              "lookup_ms": round((time.perf_counter() - start) * 1000, 2)}
+            yield {"type": "final", "answer": answer, "debug": debug}
+            return
+
+    debug: Dict[str, Any] = {"attempts": []}
+    if use_cache:
+        debug["cache"] = {"hit": False}
+    query = user_query
+    best_answer = ""
+    best_chunks: List[Dict[str, str]] = []
+    chunks: List[Dict[str, str]] = []
+
+    # Speculative mode: retrieve for the query and both fallback refinements at
+    # once, so a fallback refine step only costs a generation.
+    speculative_tasks: Dict[str, asyncio.Task] = {}
+    if speculative:
+        for q in dict.fromkeys([user_query, _fallback_query(user_query, "refine"), _fallback_query(user_query, "fail")]):
+            speculative_tasks[q] = asyncio.create_task(_retrieve(q, top_k))
+        debug["speculative"] = {"queries": len(speculative_tasks), "hits": 0, "cancelled": 0}
+
+    def stop_speculation():
+        # Speculative work nobody used (e.g. the first answer was good)
+        for task in speculative_tasks.values():
+            if not task.done():
+                task.cancel()
+                debug["speculative"]["cancelled"] += 1
+            elif not task.cancelled():
+                task.exception()  # mark failures of unused queries as retrieved
+        speculative_tasks.clear()
+
+    try:
+        for attempt in range(1, max_loops + 1):
+            if attempt > 1:
+                yield {"type": "status", "text": f"Refining the answer (attempt {attempt}/{max_loops})..."}
+
+            previous_chunks = chunks
+            if query in speculative_tasks:
+                chunks = await speculative_tasks[query]
+                debug["speculative"]["hits"] += 1
+            else:
+                chunks = await _retrieve(query, top_k)
+            if speculative and attempt > 1:
+                chunks = _merge_chunks(chunks, previous_chunks, top_k=top_k)
+
+            if stream and attempt == 1:
+                # Stream the first answer so the user sees tokens before judging
+                pieces: List[str] = []
+                async for piece in llm.stream_answer_with_context(_build_answer_prompt(query, chunks), chunks):
+                    if not pieces:
+                        debug["ttft_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                    pieces.append(piece)
+                    yield {"type": "token", "text": piece}
+                answer = "".join(pieces)
+            else:
+                answer = await _answer(query, chunks)
+
+            debug["attempts"].append({
+                "attempt": attempt,
+                "query": query,
+                "num_chunks": len(chunks),
+                "first_links": [c.get("link", "") for c in chunks[:3]],
+                "answer_preview": answer[:400]
+            })
+
+            # Track best so far by amount of grounding
+            if len(chunks) > len(best_chunks):
+                best_chunks = chunks
+                best_answer = answer
+
+            yield {"type": "status", "text": "Checking the answer..."}
+            decision = await _judge_answer(user_query, answer, chunks)
+            debug["attempts"][-1]["judge"] = decision
+            yield {"type": "judge", "attempt": attempt, "decision": decision}
+
+            status = decision.get("status", "fail")
+            if status == "good":
+                stop_speculation()
+                debug["final"] = {"status": "good", "attempt": attempt}
+                if use_cache:
+                    cache.store(cache_company, user_query, query_embedding, answer, debug, cache_version)
+                yield {"type": "final", "answer": answer, "debug": debug}
+                return
+
+            if status == "refine":
+                # If judge did not supply a new query, create a more targeted refinement:
+                query = (decision.get("new_query") or "").strip() or _fallback_query(user_query, "refine")
+                continue
+
+            # status == "fail"
+            if attempt < max_loops:
+                query = _fallback_query(user_query, "fail")
+                continue
+            break
+    finally:
+        stop_speculation()
+
+    # Fallback: return best effort
+    if best_answer:
+        debug["final"] = {"status": "best_effort", "attempts": len(debug['attempts'])}
+        yield {"type": "final", "answer": best_answer, "debug": debug}
+        return
+
+    debug["final"] = {"status": "no_answer", "attempts": len(debug['attempts'])}
+    yield {"type": "final", "answer": "I couldn't find a reliable answer in the knowledge base.", "debug": debug}
+
+
 async def agentic_rag(
     user_query: str,
     *,
     max_loops: int = 3,
-    top_k: int = 6
+    top_k: int = 6,
+    use_cache: bool = True,
+    speculative: bool = False
 ) -> Tuple[str, Dict[str, Any]]:
     """
     Agentic RAG loop:
+      0) serve a semantically equivalent cached answer if one exists
       1) retrieve → answer
       2) judge
       3) optionally refine the query and retry
     Stops when status is "good" or loop limit reached.
+    With speculative=True the original query and the templated fallback
+    refinements are retrieved concurrently up front; refine steps reuse those
+    results (merged with the previous attempt's, one chunk per link) and
+    unused retrievals are cancelled once the loop ends.
     Returns (final_answer, debug_dict).
     """
-    debug: Dict[str, Any] = {"attempts": []}
-    query = user_query
-    best_answer = ""
-    best_chunks: List[Dict[str, str]] = []
+    async for event in _agentic_events(user_query, max_loops, top_k, use_cache, stream=False,
+                                       speculative=speculative):
+        if event["type"] == "final":
+            return event["answer"], event["debug"]
 
-    for attempt in range(1, max_loops + 1):
-        answer, chunks = await _retrieve_and_answer(query, top_k=top_k)
-
-        debug["attempts"].append({
-            "attempt": attempt,
-            "query": query,
-            "num_chunks": len(chunks),
-            "first_links": [c.get("link", "") for c in chunks[:3]],
-            "answer_preview": answer[:400]
-        })
-
-        # Track best so far by amount of grounding
-        if len(chunks) > len(best_chunks):
-            best_chunks = chunks
-            best_answer = answer
-
-        decision = await _judge_answer(user_query, answer, chunks)
-        debug["attempts"][-1]["judge"] = decision
-
-        status = decision.get("status", "fail")
-        if status == "good":
-            debug["final"] = {"status": "good", "attempt": attempt}
-            return answer, debug
-
-        if status == "refine":
-            new_q = (decision.get("new_query") or "").strip()
-            # If judge did not supply a new query, create a more targeted refinement:
-            if not new_q:
-                company = _maybe_extract_company(user_query)
-                company_hint = f" company:{company}" if company else ""
-                new_q = (
-                    f"{user_query}{company_hint} interview experience interview process onsite rounds behavioral system design DSA coding"
-                )
-            query = new_q
-            continue
-
-        # status == "fail"
-        if attempt < max_loops:
-            company = _maybe_extract_company(user_query)
-            company_hint = f" company:{company}" if company else ""
-            query = f"{user_query}{company_hint} interview experience role responsibilities questions preparation tips"
-            continue
-        break
-
-    # Fallback: return best effort
-    if best_answer:
-        debug["final"] = {"status": "best_effort", "attempts": len(debug['attempts'])}
-        return best_answer, debug
 
-    debug["final"] = {"status": "no_answer", "attempts": len(debug['attempts'])}
-    return "I couldn't find a reliable answer in the knowledge base.", debug
+async def agentic_rag_stream(
+    user_query: str,
+    *,
+    max_loops: int = 3,
+    top_k: int = 6,
+    use_cache: bool = True,
+    speculative: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Same loop as agentic_rag, but the first answer is streamed token by token
+    and judged once it is complete. If the judge asks for a refinement the
+    remaining attempts run without streaming and the "final" event carries
+    the answer that replaces the streamed one. debug["ttft_ms"] is the time
+    to the first token.
+    """
+    async for event in _agentic_events(user_query, max_loops, top_k, use_cache, stream=True,
+                                       speculative=speculative):
+        yield event
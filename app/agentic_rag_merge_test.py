@@ -0,0 +1,36 @@
+from app.agentic_rag import _merge_chunks
+
+
+def _chunk(link, score, text=""):
+    return {"link": link, "summary": text or link, "score": score}
+
+
+def test_merge_ranks_by_position_not_raw_score():
+    # Scores from different searches are on different scales; 0.02 from the
+    # second list must not lose to 0.5 just because the first list scores higher
+    first = [_chunk("a", 0.9), _chunk("b", 0.5)]
+    second = [_chunk("b", 0.02), _chunk("c", 0.01)]
+    merged = _merge_chunks(first, second, top_k=3)
+    assert [c["link"] for c in merged] == ["b", "a", "c"]
+
+
+def test_merge_counts_a_link_once_per_list():
+    first = [_chunk("a", 0.9, "a1"), _chunk("a", 0.8, "a2"), _chunk("b", 0.7)]
+    second = [_chunk("b", 0.6)]
+    merged = _merge_chunks(first, second, top_k=5)
+    assert [c["link"] for c in merged] == ["b", "a"]
+    # The first chunk seen for a link is the one kept
+    assert merged[1]["summary"] == "a1"
+
+
+def test_merge_caps_at_top_k_and_handles_empty_lists():
+    chunks = [_chunk(str(i), 1.0 - i / 10) for i in range(5)]
+    assert [c["link"] for c in _merge_chunks(chunks, [], top_k=2)] == ["0", "1"]
+    assert _merge_chunks([], [], top_k=3) == []
+
+
+def test_merge_rewards_links_found_by_both_lists():
+    # y: 2 / (60 + 2) beats x and z: 1 / (60 + 1) each
+    first = [_chunk("x", 1), _chunk("y", 1)]
+    second = [_chunk("z", 1), _chunk("y", 1)]
+    assert _merge_chunks(first, second, top_k=1)[0]["link"] == "y"
@@ -0,0 +1,131 @@
+# app/answer_cache.py
+import copy
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_PER_COMPANY = int(os.getenv("ANSWER_CACHE_MAX_PER_COMPANY", "256"))
+
+
+def _scope(company: str) -> str:
+    return (company or "").strip().lower()
+
+
+def _unit(vec: List[float]) -> np.ndarray:
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(arr)
+    return arr / norm if norm else arr
+
+
+class SemanticAnswerCache:
+    """
+    Caches final agentic_rag answers per company scope and serves them again for
+    queries whose embedding has cosine similarity >= `threshold` with a cached one.
+
+    The cache lives in one process. invalidate() covers ingests run in the same
+    process; for ingests run elsewhere (the API vs the Streamlit app) callers pass
+    the company's ingest `version` from the database, and entries stored under a
+    different version are dropped on lookup.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 ttl_seconds: float = ANSWER_CACHE_TTL,
+                 max_entries_per_company: int = ANSWER_CACHE_MAX_PER_COMPANY):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_company = max_entries_per_company
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, company: str, embedding: List[float],
+               version: Optional[float] = None) -> Optional[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """
+        Returns (answer, debug, match_info) for the closest cached answer above the
+        threshold, or None.
+        """
+        scope = _scope(company)
+        now = time.time()
+        with self._lock:
+            entries = [
+                e for e in self._entries.get(scope, [])
+                if now - e["created_at"] < self.ttl_seconds and e["version"] == version
+            ]
+            self._entries[scope] = entries
+            if not entries:
+                self.misses += 1
+                return None
+
+            matrix = np.vstack([e["vector"] for e in entries])
+            similarities = matrix @ _unit(embedding)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry = entries[best]
+            match = {
+                "similarity": round(similarity, 4),
+                "matched_query": entry["query"],
+                "age_seconds": round(now - entry["created_at"], 1),
+            }
+            return entry["answer"], copy.deepcopy(entry["debug"]), match
+
+    def store(self, company: str, query: str, embedding: List[float],
+              answer: str, debug: Dict[str, Any], version: Optional[float] = None) -> None:
+        scope = _scope(company)
+        with self._lock:
+            entries = self._entries.setdefault(scope, [])
+            entries.append({
+                "query": query,
+                "vector": _unit(embedding),
+                "answer": answer,
+                "debug": copy.deepcopy(debug),
+                "created_at": time.time(),
+                "version": version,
+            })
+            if len(entries) > self.max_entries_per_company:
+                del entries[: len(entries) - self.max_entries_per_company]
+
+    def invalidate(self, company: str) -> None:
+        """
+        Drop answers for `company` after new posts were ingested for it. Answers to
+        company-less questions may draw on any company's posts, so they go too.
+        """
+        with self._lock:
+            self._entries.pop(_scope(company), None)
+            self._entries.pop("", None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": {scope: len(entries) for scope, entries in self._entries.items()},
+            }
+
+
+_default_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SemanticAnswerCache()
+    return _default_cache
+
+
+def invalidate_company(company: str) -> None:
+    get_answer_cache().invalidate(company)
@@ -1,7 +1,21 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.db_functions.schema import ensure_schema
 from app.scraper_runner import ScraperRunner
+from app.scrapers.browser_pool import shutdown_browser_pool
+from app.scrapers.http_session import close_http_session
+
 
-app = FastAPI(title="Leetcode Scraper API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_schema()
+    yield
+    # The browser pool stays warm across requests; stop Chromium on shutdown
+    await shutdown_browser_pool()
+    await close_http_session()
+
+app = FastAPI(title="Leetcode Scraper API", lifespan=lifespan)
 
 @app.get("/")
 async def root():
@@ -15,6 +29,6 @@ async def trigger_scraper(company: str):
 
 
 def start_scraping(company: str):
-    runner = ScraperRunner(company, ["gfg","leetcode"])
+    from app.main import ingest_companies
     import asyncio
-    asyncio.run(runner.process())
+    asyncio.run(ingest_companies([company]))
@@ -0,0 +1,67 @@
+# app/background_loop.py
+import asyncio
+import atexit
+import sys
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+
+
+class BackgroundLoop:
+    """
+    An event loop running forever on a daemon thread, for sync callers (the
+    Streamlit script) that need to run coroutines without asyncio.run().
+    Loop-bound resources such as the LLMClient session and the browser pool
+    survive between calls instead of being rebuilt for every new loop, and
+    are closed on this loop by close(), which also runs at interpreter exit.
+    """
+
+    def __init__(self, name: str = "app-event-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run `coro` on the loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        """
+        Drive an async generator from the calling thread, one item at a time,
+        so the caller can act on each item (e.g. render it) in its own thread.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.run(_close_shared_resources(), timeout=30)
+        except Exception as e:
+            print(f"⚠️ Failed to close shared resources: {e!r}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+async def _close_shared_resources() -> None:
+    # Only modules that were imported can own anything; importing the others
+    # here would pull Playwright into processes that never scraped.
+    if "app.scrapers.browser_pool" in sys.modules:
+        await sys.modules["app.scrapers.browser_pool"].shutdown_browser_pool()
+    if "app.scrapers.http_session" in sys.modules:
+        await sys.modules["app.scrapers.http_session"].close_http_session()
+    if "app.llm.llm_client" in sys.modules:
+        await sys.modules["app.llm.llm_client"].close_llm_client()
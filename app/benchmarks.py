@@ -0,0 +1,109 @@
+# app/benchmarks.py
+"""
+Local performance benchmarks.
+
+Usage:
+    python -m app.benchmarks chunking [--docs 200] [--max-tokens 1024] [--overlap 0]
+    python -m app.benchmarks startup [--module app.agentic_rag] [--budget 1.5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SAMPLE_POST = (
+    "Round 1 was an online assessment with two DSA questions on arrays and graphs. "
+    "The second question needed a BFS with pruning.\n"
+    "Round 2 (technical): discussed my projects, then a design question on rate limiting. "
+    "The interviewer asked about token buckets vs sliding windows!\n"
+    "Round 3 (managerial): behavioural questions, conflict resolution, why this company?\n"
+)
+
+
+def bench_chunking(docs: int = 200, repeat: int = 40, max_tokens: int = 1024, overlap_tokens: int = 0):
+    from app.llm import get_chunks
+
+    texts = [SAMPLE_POST * repeat for _ in range(docs)]
+    chars = sum(len(t) for t in texts)
+
+    start = time.perf_counter()
+    chunks = get_chunks.chunk_texts_by_tokens(texts, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    elapsed = time.perf_counter() - start
+
+    n_chunks = sum(len(c) for c in chunks)
+    print(f"📊 Chunked {docs} docs ({chars / 1e6:.2f}M chars) into {n_chunks} chunks in {elapsed:.3f}s")
+    print(f"   {docs / elapsed:.1f} docs/sec, {chars / elapsed / 1e6:.2f}M chars/sec")
+    return {"docs": docs, "chunks": n_chunks, "seconds": elapsed, "docs_per_sec": docs / elapsed}
+
+
+# Runs in a fresh interpreter so nothing is already imported or warmed up.
+_STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+from app.db_functions import db_pool
+print(json.dumps({{
+    "seconds": elapsed,
+    "tokenizer_loaded": "transformers" in sys.modules,
+    "playwright_loaded": "playwright" in sys.modules,
+    "db_pool_created": db_pool._pool is not None,
+}}))
+"""
+
+
+def bench_startup(module: str = "app.agentic_rag", budget: float = 1.5, runs: int = 3):
+    """
+    Import `module` in fresh interpreters and fail if the best time exceeds
+    `budget` seconds or if the import eagerly loads heavy resources.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _STARTUP_PROBE.format(module=module)],
+            cwd=root, capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    best = min(s["seconds"] for s in samples)
+    report = {**samples[-1], "seconds": best, "budget": budget, "module": module}
+    print(f"📊 import {module}: {best * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+    for key in ("tokenizer_loaded", "playwright_loaded", "db_pool_created"):
+        print(f"   {key}: {report[key]}")
+
+    eager = [k for k in ("tokenizer_loaded", "playwright_loaded", "db_pool_created") if report[k]]
+    if best > budget or eager:
+        print(f"❌ Startup check failed ({', '.join(eager) or 'over budget'})")
+        sys.exit(1)
+    print("✅ Startup within budget")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local performance benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    chunking = sub.add_parser("chunking", help="get_chunks throughput")
+    chunking.add_argument("--docs", type=int, default=200)
+    chunking.add_argument("--repeat", type=int, default=40, help="sample paragraphs per doc")
+    chunking.add_argument("--max-tokens", type=int, default=1024)
+    chunking.add_argument("--overlap", type=int, default=0)
+
+    startup = sub.add_parser("startup", help="cold import time of an app module")
+    startup.add_argument("--module", default="app.agentic_rag")
+    startup.add_argument("--budget", type=float, default=float(os.getenv("STARTUP_BUDGET", "1.5")),
+                         help="seconds")
+    startup.add_argument("--runs", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "chunking":
+        bench_chunking(args.docs, args.repeat, args.max_tokens, args.overlap)
+    elif args.command == "startup":
+        bench_startup(args.module, args.budget, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,345 @@
+"""
+Local scrape cache backed by a single SQLite file (default data/cache.sqlite3).
+
+Links, posts and the per-link index are stored per cache key
+("<company>_<source>"). Posts are written in small batches with zlib-compressed
+content, so a scrape can stream into the cache and large companies can be read
+back without loading one big JSON document. Entries expire after
+SCRAPE_CACHE_TTL seconds, and the oldest posts are evicted once stored content
+exceeds SCRAPE_CACHE_MAX_BYTES.
+
+Existing data/<company>/*.json caches are imported once, the first time the
+database is created (or on demand: `python -m app.cache_local migrate`).
+"""
 import os
 import json
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+CACHE_ROOT = "data"
+CACHE_DB_PATH = os.getenv("SCRAPE_CACHE_PATH", os.path.join(CACHE_ROOT, "cache.sqlite3"))
+CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", str(30 * 24 * 3600)))
+CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_conn = None
+_lock = threading.RLock()
+
+
+def _key(title):
+    return title.lower().replace(' ', '_')
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                fresh = not os.path.exists(CACHE_DB_PATH)
+                os.makedirs(os.path.dirname(CACHE_DB_PATH) or ".", exist_ok=True)
+                conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS cache_keys (
+                        cache_key TEXT PRIMARY KEY,
+                        links_saved_at REAL,
+                        posts_complete INTEGER NOT NULL DEFAULT 0
+                    );
+                    CREATE TABLE IF NOT EXISTS links (
+                        cache_key TEXT NOT NULL,
+                        position INTEGER NOT NULL,
+                        title TEXT,
+                        link TEXT NOT NULL,
+                        PRIMARY KEY (cache_key, position)
+                    );
+                    CREATE TABLE IF NOT EXISTS posts (
+                        cache_key TEXT NOT NULL,
+                        link TEXT NOT NULL,
+                        title TEXT,
+                        content BLOB,
+                        size INTEGER NOT NULL,
+                        updated_at REAL NOT NULL,
+                        PRIMARY KEY (cache_key, link)
+                    );
+                    CREATE INDEX IF NOT EXISTS posts_updated_at ON posts(updated_at);
+                    CREATE TABLE IF NOT EXISTS link_index (
+                        cache_key TEXT NOT NULL,
+                        link TEXT NOT NULL,
+                        content_hash TEXT,
+                        last_seen REAL,
+                        scraped_at REAL,
+                        PRIMARY KEY (cache_key, link)
+                    );
+                """)
+                conn.commit()
+                _conn = conn
+                if fresh:
+                    migrate_json_cache()
+                evict()
+    return _conn
+
 
-def get_cache_path(company_name):
-    folder = f"data/{company_name.lower().replace(' ', '_')}"
-    os.makedirs(folder, exist_ok=True)
-    return os.path.join(folder, "links.json")
+# ---------- Eviction ----------
+
+def evict(now=None):
+    """
+    Drop entries older than CACHE_TTL, then the oldest posts until stored
+    content fits in CACHE_MAX_BYTES.
+    """
+    conn = _get_conn()
+    cutoff = (now or time.time()) - CACHE_TTL
+    with _lock:
+        # A key that lost posts to either rule is no longer a complete snapshot
+        conn.execute("""
+            UPDATE cache_keys SET posts_complete = 0
+            WHERE cache_key IN (SELECT DISTINCT cache_key FROM posts WHERE updated_at < ?)
+        """, (cutoff,))
+        conn.execute("DELETE FROM posts WHERE updated_at < ?", (cutoff,))
+        expired = [r[0] for r in conn.execute(
+            "SELECT cache_key FROM cache_keys WHERE links_saved_at < ?", (cutoff,))]
+        for cache_key in expired:
+            conn.execute("DELETE FROM links WHERE cache_key = ?", (cache_key,))
+            conn.execute("UPDATE cache_keys SET links_saved_at = NULL WHERE cache_key = ?", (cache_key,))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM posts").fetchone()[0]
+        if total > CACHE_MAX_BYTES:
+            rows = conn.execute("SELECT cache_key, link, size FROM posts ORDER BY updated_at ASC")
+            victims = []
+            for cache_key, link, size in rows:
+                if total <= CACHE_MAX_BYTES:
+                    break
+                victims.append((cache_key, link))
+                total -= size
+            conn.executemany("DELETE FROM posts WHERE cache_key = ? AND link = ?", victims)
+            conn.executemany("UPDATE cache_keys SET posts_complete = 0 WHERE cache_key = ?",
+                             {(k,) for k, _ in victims})
+        conn.commit()
+
+
+# ---------- Links ----------
 
 def save_links_to_cache(company_name, links):
-    path = get_cache_path(company_name)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(links, f, indent=2)
+    conn = _get_conn()
+    cache_key = _key(company_name)
+    with _lock:
+        conn.execute("DELETE FROM links WHERE cache_key = ?", (cache_key,))
+        conn.executemany(
+            "INSERT INTO links (cache_key, position, title, link) VALUES (?, ?, ?, ?)",
+            [(cache_key, i, l.get("title"), l["link"]) for i, l in enumerate(links or [])]
+        )
+        conn.execute("""
+            INSERT INTO cache_keys (cache_key, links_saved_at) VALUES (?, ?)
+            ON CONFLICT (cache_key) DO UPDATE SET links_saved_at = excluded.links_saved_at
+        """, (cache_key, time.time()))
+        conn.commit()
 
 def load_links_from_cache(company_name):
-    path = get_cache_path(company_name)
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return None
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(
+            "SELECT title, link FROM links WHERE cache_key = ? ORDER BY position",
+            (_key(company_name),)
+        ).fetchall()
+    return [{"title": title, "link": link} for title, link in rows] or None
+
+
+# ---------- Posts ----------
+
+_INSERT_POST_SQL = """
+    INSERT OR REPLACE INTO posts (cache_key, link, title, content, size, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def _post_row(title, post, now):
+    blob = zlib.compress((post.get("content") or "").encode("utf-8"))
+    return (_key(title), post["link"], post.get("title"), blob, len(blob), now)
+
+def append_scraped_posts(title, posts, now=None):
+    """
+    Stream a batch of scraped posts into the cache (insert or replace by link)
+    in one transaction.
+    """
+    if not posts:
+        return
+    conn = _get_conn()
+    now = now or time.time()
+    with _lock:
+        conn.executemany(_INSERT_POST_SQL, [_post_row(title, post, now) for post in posts])
+        conn.execute("INSERT OR IGNORE INTO cache_keys (cache_key) VALUES (?)", (_key(title),))
+        conn.commit()
+
+def append_scraped_post(title, post, now=None):
+    append_scraped_posts(title, [post], now)
+
+def clear_scraped_posts(title):
+    """
+    Drop the cached posts for `title` before a full re-scrape streams a new snapshot.
+    """
+    conn = _get_conn()
+    with _lock:
+        conn.execute("DELETE FROM posts WHERE cache_key = ?", (_key(title),))
+        conn.execute("UPDATE cache_keys SET posts_complete = 0 WHERE cache_key = ?", (_key(title),))
+        conn.commit()
+
+def mark_scraped_data_complete(title):
+    """
+    Flag the streamed posts for `title` as a full snapshot that
+    load_scraped_data_from_cache may return.
+    """
+    conn = _get_conn()
+    with _lock:
+        conn.execute("""
+            INSERT INTO cache_keys (cache_key, posts_complete) VALUES (?, 1)
+            ON CONFLICT (cache_key) DO UPDATE SET posts_complete = 1
+        """, (_key(title),))
+        conn.commit()
+    evict()
 
 def save_scraped_data_to_cache(title, data):
-    folder = f"data/{title.lower().replace(' ', '_')}"
-    path = os.path.join(folder, "scraped_data.json")
-    os.makedirs(folder, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    conn = _get_conn()
+    now = time.time()
+    with _lock:
+        conn.execute("DELETE FROM posts WHERE cache_key = ?", (_key(title),))
+        conn.executemany(_INSERT_POST_SQL, [_post_row(title, post, now) for post in data or []])
+        conn.commit()
+    mark_scraped_data_complete(title)
     return None
 
-def get_scraped_data_path(title):
-    folder = f"data/{title.lower().replace(' ', '_')}"
-    os.makedirs(folder, exist_ok=True)
-    return os.path.join(folder, f"scraped_data.json")
+def iter_scraped_data_from_cache(title, batch_size=200):
+    """
+    Yield cached posts one by one without loading the whole company at once.
+    Yields nothing unless the cache holds a complete snapshot for `title`.
+    """
+    conn = _get_conn()
+    cache_key = _key(title)
+    with _lock:
+        row = conn.execute("SELECT posts_complete FROM cache_keys WHERE cache_key = ?", (cache_key,)).fetchone()
+    if not row or not row[0]:
+        return
+    last_rowid = 0
+    while True:
+        with _lock:
+            rows = conn.execute("""
+                SELECT rowid, link, title, content FROM posts
+                WHERE cache_key = ? AND rowid > ? ORDER BY rowid LIMIT ?
+            """, (cache_key, last_rowid, batch_size)).fetchall()
+        if not rows:
+            return
+        for rowid, link, post_title, blob in rows:
+            last_rowid = rowid
+            yield {"link": link, "title": post_title, "content": zlib.decompress(blob).decode("utf-8")}
 
 def load_scraped_data_from_cache(title):
-    path = get_scraped_data_path(title)
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return None
\ No newline at end of file
+    posts = list(iter_scraped_data_from_cache(title))
+    return posts or None
+
+
+# ---------- Per-link index (incremental ingest) ----------
+
+def content_hash(content):
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+def load_link_index(title):
+    """
+    {link: {"content_hash", "last_seen", "scraped_at"}} recorded by incremental ingests.
+    """
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(
+            "SELECT link, content_hash, last_seen, scraped_at FROM link_index WHERE cache_key = ?",
+            (_key(title),)
+        ).fetchall()
+    index = {}
+    for link, digest, last_seen, scraped_at in rows:
+        entry = {"last_seen": last_seen}
+        if digest is not None:
+            entry.update({"content_hash": digest, "scraped_at": scraped_at})
+        index[link] = entry
+    return index
+
+def save_link_index(title, index):
+    conn = _get_conn()
+    with _lock:
+        conn.executemany("""
+            INSERT OR REPLACE INTO link_index (cache_key, link, content_hash, last_seen, scraped_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (_key(title), link, e.get("content_hash"), e.get("last_seen"), e.get("scraped_at"))
+            for link, e in index.items()
+        ])
+        conn.commit()
+
+def mark_links_seen(index, links, now=None):
+    now = now or time.time()
+    for link in links:
+        index.setdefault(link["link"], {})["last_seen"] = now
+    return index
+
+def post_changed(index, post):
+    """
+    True if the post's content differs from the hash recorded in `index`.
+    """
+    return index.get(post["link"], {}).get("content_hash") != content_hash(post.get("content"))
+
+def record_scraped_post(index, post, now=None):
+    """
+    Store the post's content hash. Returns True if the content is new or changed.
+    """
+    now = now or time.time()
+    entry = index.setdefault(post["link"], {})
+    digest = content_hash(post.get("content"))
+    changed = entry.get("content_hash") != digest
+    entry.update({"content_hash": digest, "scraped_at": now, "last_seen": now})
+    return changed
+
+
+# ---------- One-shot migration from data/<company>/*.json ----------
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def migrate_json_cache(root=CACHE_ROOT):
+    """
+    Import legacy links.json / scraped_data.json / link_index.json files and
+    rename them to *.migrated so they are not imported twice.
+    """
+    if not os.path.isdir(root):
+        return 0
+    migrated = 0
+    for name in sorted(os.listdir(root)):
+        folder = os.path.join(root, name)
+        if not os.path.isdir(folder):
+            continue
+        files = {f: os.path.join(folder, f) for f in ("links.json", "scraped_data.json", "link_index.json")}
+        if not any(os.path.exists(p) for p in files.values()):
+            continue
+        try:
+            if os.path.exists(files["links.json"]):
+                save_links_to_cache(name, _read_json(files["links.json"]))
+            if os.path.exists(files["scraped_data.json"]):
+                save_scraped_data_to_cache(name, _read_json(files["scraped_data.json"]))
+            if os.path.exists(files["link_index.json"]):
+                save_link_index(name, _read_json(files["link_index.json"]))
+        except Exception as e:
+            print(f"❌ Failed to migrate cache folder {folder}: {e}")
+            continue
+        for path in files.values():
+            if os.path.exists(path):
+                os.rename(path, path + ".migrated")
+        migrated += 1
+        print(f"📦 Migrated JSON cache for {name}")
+    return migrated
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["migrate"]:
+        print(f"✅ Migrated {migrate_json_cache()} cache folders into {CACHE_DB_PATH}")
+    elif sys.argv[1:] == ["evict"]:
+        evict()
+        print("✅ Evicted expired and oversized cache entries")
+    else:
+        print("Usage: python -m app.cache_local migrate|evict")
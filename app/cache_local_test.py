@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app import cache_local
+
+
+@pytest.fixture(autouse=True)
+def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_local, "CACHE_DB_PATH", str(tmp_path / "cache.sqlite3"))
+    # The first connection imports data/<company>/*.json; keep real caches out of it
+    monkeypatch.setattr(cache_local, "migrate_json_cache", lambda root=None: 0)
+    monkeypatch.setattr(cache_local, "_conn", None)
+    yield
+    if cache_local._conn is not None:
+        cache_local._conn.close()
+
+
+def _post(link, content="body"):
+    return {"link": link, "title": link.upper(), "content": content}
+
+
+def test_snapshot_is_only_served_once_complete():
+    cache_local.append_scraped_posts("acme_gfg", [_post("a"), _post("b")])
+    assert cache_local.load_scraped_data_from_cache("acme_gfg") is None
+    cache_local.mark_scraped_data_complete("acme_gfg")
+    assert [p["link"] for p in cache_local.load_scraped_data_from_cache("acme_gfg")] == ["a", "b"]
+
+
+def test_clear_drops_old_snapshot_before_rescrape():
+    cache_local.save_scraped_data_to_cache("acme_gfg", [_post("old")])
+    cache_local.clear_scraped_posts("acme_gfg")
+    assert cache_local.load_scraped_data_from_cache("acme_gfg") is None
+    cache_local.append_scraped_post("acme_gfg", _post("new"))
+    cache_local.mark_scraped_data_complete("acme_gfg")
+    assert [p["link"] for p in cache_local.load_scraped_data_from_cache("acme_gfg")] == ["new"]
+
+
+def test_ttl_eviction_marks_snapshot_incomplete():
+    old = time.time() - cache_local.CACHE_TTL - 10
+    cache_local.save_scraped_data_to_cache("acme_gfg", [_post("fresh")])
+    cache_local.append_scraped_post("acme_gfg", _post("stale"), now=old)
+    cache_local.evict()
+    # A snapshot that lost a post must not be served as complete
+    assert cache_local.load_scraped_data_from_cache("acme_gfg") is None
+
+
+def test_size_eviction_drops_oldest_posts_first(monkeypatch):
+    now = time.time()
+    cache_local.append_scraped_post("acme_gfg", _post("older"), now=now - 5)
+    cache_local.append_scraped_post("other_gfg", _post("newer"), now=now)
+    size = cache_local._get_conn().execute("SELECT size FROM posts WHERE link = 'newer'").fetchone()[0]
+    monkeypatch.setattr(cache_local, "CACHE_MAX_BYTES", size)
+    cache_local.evict()
+    links = [r[0] for r in cache_local._get_conn().execute("SELECT link FROM posts")]
+    assert links == ["newer"]
+
+
+def test_expired_links_are_dropped():
+    cache_local.save_links_to_cache("acme_gfg", [{"title": "t", "link": "a"}])
+    assert cache_local.load_links_from_cache("acme_gfg") == [{"title": "t", "link": "a"}]
+    cache_local.evict(now=time.time() + cache_local.CACHE_TTL + 10)
+    assert cache_local.load_links_from_cache("acme_gfg") is None
+
+
+def test_post_changed_follows_recorded_hash():
+    index = {}
+    post = _post("a", "first")
+    assert cache_local.post_changed(index, post)
+    # Checking does not record anything
+    assert cache_local.post_changed(index, post)
+    assert cache_local.record_scraped_post(index, post)
+    assert not cache_local.post_changed(index, post)
+    assert cache_local.post_changed(index, _post("a", "second"))
+
+
+def test_link_index_round_trips():
+    index = cache_local.mark_links_seen({}, [{"link": "a"}, {"link": "b"}], now=100.0)
+    cache_local.record_scraped_post(index, _post("a"), now=200.0)
+    cache_local.save_link_index("acme_gfg", index)
+    loaded = cache_local.load_link_index("acme_gfg")
+    assert loaded["a"]["content_hash"] == cache_local.content_hash("body")
+    assert loaded["a"]["scraped_at"] == 200.0
+    assert loaded["b"] == {"last_seen": 100.0}
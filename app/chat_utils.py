@@ -1,12 +1,17 @@
+import asyncio
+from functools import partial
+
 from app.llm import llm_functions as llm
 from app.db_functions import get_similar_results
-from app import main
 
 async def get_contextual_answer(user_query: str, debug: bool = False):
-    embedding = await llm.create_embeddings(user_query)
-    chunks = get_similar_results.search_similar_summaries(embedding, top_k=6)
+    embedding = await llm.create_query_embedding(user_query)
+    loop = asyncio.get_running_loop()
+    chunks = await loop.run_in_executor(
+        None, partial(get_similar_results.search_similar_summaries, user_query, embedding, top_k=6)
+    )
     print(f"🔍 Found {len(chunks)} relevant chunks for the query.")
-    answer = llm.generate_answer_with_context(user_query, chunks)
+    answer = await llm.async_generate_answer_with_context(user_query, chunks)
     # Format debug info nicely
     if debug:
         debug_info = "\n\n---\n\n".join(
@@ -19,4 +24,6 @@ async def get_contextual_answer(user_query: str, debug: bool = False):
 
 
 def scrape_and_add_company(name: str):
+    # Imported lazily: main pulls in the scrapers and Playwright.
+    from app import main
     return main.scrape_and_add_company(name)
\ No newline at end of file
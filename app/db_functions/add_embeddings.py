@@ -1,28 +1,155 @@
-import psycopg2
+from psycopg2.extras import execute_values
 import asyncio
+import threading
+import time
 
-def insert_post(link, summary, embedding):
-    conn = psycopg2.connect(
-        dbname="ragdb",
-        user="postgres",
-        password="postgres",
-        host="localhost",
-        port=5432
-    )
-    cur = conn.cursor()
+from app.db_functions.db_pool import get_connection
+
+# Rows are keyed by (link, chunk_index). A re-ingested chunk only rewrites its
+# row when its text hash changed.
+_UPSERT_SQL = """
+    INSERT INTO posts (link, chunk_index, chunk_hash, summary, embedding)
+    VALUES %s
+    ON CONFLICT (link, chunk_index) DO UPDATE
+    SET chunk_hash = EXCLUDED.chunk_hash,
+        summary = EXCLUDED.summary,
+        embedding = EXCLUDED.embedding
+    WHERE posts.chunk_hash IS DISTINCT FROM EXCLUDED.chunk_hash;
+"""
+
+
+def insert_post(link, summary, embedding, chunk_index=0, chunk_hash=None):
     try:
-        cur.execute("""
-            INSERT INTO posts (link, summary, embedding)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (link) DO NOTHING;
-        """, (link, summary, embedding))
-        conn.commit()
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, _UPSERT_SQL, [(link, chunk_index, chunk_hash, summary, embedding)])
     except Exception as e:
         print(f"❌ Failed to insert: {e}")
-    finally:
-        cur.close()
-        conn.close()
 
-async def insert_post_async(link, summary, embedding):
+async def insert_post_async(link, summary, embedding, chunk_index=0, chunk_hash=None):
     loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, insert_post, link, summary, embedding)
\ No newline at end of file
+    await loop.run_in_executor(None, insert_post, link, summary, embedding, chunk_index, chunk_hash)
+
+
+def get_chunk_hashes(links):
+    """
+    {link: {chunk_index: chunk_hash}} for the chunks already stored for `links`.
+    """
+    if not links:
+        return {}
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT link, chunk_index, chunk_hash FROM posts WHERE link = ANY(%s);
+            """, (list(links),))
+            rows = cur.fetchall()
+    hashes = {}
+    for link, chunk_index, chunk_hash in rows:
+        hashes.setdefault(link, {})[chunk_index] = chunk_hash
+    return hashes
+
+
+def delete_chunks_from(link, first_stale_index):
+    """
+    Remove chunks of `link` at or beyond `first_stale_index` (the post got shorter).
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM posts WHERE link = %s AND chunk_index >= %s;
+            """, (link, first_stale_index))
+            return cur.rowcount
+
+
+class BulkInserter:
+    """
+    Buffers (link, chunk_index, chunk_hash, summary, embedding) rows and writes
+    them with multi-row upserts over pooled connections.
+
+    A flush happens when `flush_size` rows are buffered, when `flush_interval`
+    seconds have passed since the last flush, or on close().
+    """
+
+    def __init__(self, flush_size: int = 500, flush_interval: float = 2.0):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._rows = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.rows_written = 0
+        self.write_seconds = 0.0
+        # Links with at least one row lost to a failed flush
+        self.failed_links = set()
+        self.started_at = time.monotonic()
+
+    def add(self, link, chunk_index, chunk_hash, summary, embedding):
+        with self._lock:
+            self._rows.append((link, chunk_index, chunk_hash, summary, embedding))
+            due = (
+                len(self._rows) >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(*row)
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+            # One statement cannot upsert the same key twice; keep the newest row
+            rows = list({(r[0], r[1]): r for r in rows}.values())
+
+            start = time.monotonic()
+            try:
+                with get_connection() as conn:
+                    with conn.cursor() as cur:
+                        execute_values(cur, _UPSERT_SQL, rows, page_size=len(rows))
+            except Exception as e:
+                print(f"❌ Failed to insert batch of {len(rows)} rows: {e}")
+                self.failed_links.update(r[0] for r in rows)
+                return 0
+
+            self.write_seconds += time.monotonic() - start
+            self.rows_written += len(rows)
+            return len(rows)
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "rows": self.rows_written,
+            "write_seconds": round(self.write_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.rows_written / elapsed, 1) if elapsed else 0.0,
+            "write_rows_per_sec": round(self.rows_written / self.write_seconds, 1) if self.write_seconds else 0.0,
+        }
+
+    def close(self):
+        self.flush()
+        stats = self.stats()
+        print(f"💾 Inserted {stats['rows']} rows at {stats['rows_per_sec']} rows/sec "
+              f"({stats['write_rows_per_sec']} rows/sec while writing)")
+        return stats
+
+    async def add_async(self, link, chunk_index, chunk_hash, summary, embedding):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.add, link, chunk_index, chunk_hash, summary, embedding)
+
+    async def add_many_async(self, rows):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.add_many, list(rows))
+
+    async def close_async(self):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,82 @@
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+
+from app.db_functions import add_embeddings
+from app.db_functions.add_embeddings import BulkInserter
+
+
+class FakeDB:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute_values(self, cur, sql, rows, page_size=None):
+        if self.fail:
+            raise RuntimeError("insert failed")
+        self.batches.append(list(rows))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(add_embeddings, "get_connection", fake.connection)
+    monkeypatch.setattr(add_embeddings, "execute_values", fake.execute_values)
+    return fake
+
+
+def _row(link, index=0, text="text"):
+    return (link, index, f"hash-{text}", text, [0.0])
+
+
+def test_flushes_when_batch_is_full(db):
+    inserter = BulkInserter(flush_size=2, flush_interval=3600)
+    inserter.add(*_row("a"))
+    assert db.batches == []
+    inserter.add(*_row("b"))
+    assert [len(b) for b in db.batches] == [2]
+    assert inserter.rows_written == 2
+
+
+def test_duplicate_keys_keep_the_newest_row(db):
+    inserter = BulkInserter(flush_size=100, flush_interval=3600)
+    inserter.add_many([_row("a", 0, "old"), _row("a", 1), _row("a", 0, "new")])
+    assert inserter.flush() == 2
+    rows = {(r[0], r[1]): r for r in db.batches[0]}
+    assert rows[("a", 0)][3] == "new"
+
+
+def test_failed_flush_records_links_and_drops_rows(db):
+    db.fail = True
+    inserter = BulkInserter(flush_size=100, flush_interval=3600)
+    inserter.add_many([_row("a"), _row("b"), _row("a", 1)])
+    assert inserter.flush() == 0
+    assert inserter.failed_links == {"a", "b"}
+    assert inserter.rows_written == 0
+
+    db.fail = False
+    inserter.add(*_row("c"))
+    assert inserter.flush() == 1
+    # A later successful flush does not clear earlier failures
+    assert inserter.failed_links == {"a", "b"}
+
+
+def test_close_async_flushes_remaining_rows(db):
+    inserter = BulkInserter(flush_size=100, flush_interval=3600)
+
+    async def run():
+        await inserter.add_many_async([_row("a"), _row("b")])
+        return await inserter.close_async()
+
+    stats = asyncio.run(run())
+    assert stats["rows"] == 2
+    assert [len(b) for b in db.batches] == [2]
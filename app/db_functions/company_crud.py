@@ -1,18 +1,8 @@
 # app/company_utils.py
 
-import psycopg2
-from datetime import datetime
+from app.db_functions.db_pool import get_connection
+from app.db_functions.schema import ensure_schema
 
-conn = psycopg2.connect(
-        dbname="ragdb",
-        user="postgres",
-        password="postgres",
-        host="localhost",
-        port=5432
-    )
-
-def get_connection():
-    return conn
 
 def list_companies():
     with get_connection() as conn:
@@ -21,8 +11,27 @@ def list_companies():
             return cur.fetchall()
 
 def add_company(name: str):
+    """
+    Add the company, or bump its ingested_at if it already exists.
+    """
+    ensure_schema()
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("INSERT INTO companies (name) VALUES (%s) ON CONFLICT (name) DO NOTHING;", (name,))
-            conn.commit()
+            cur.execute("""
+                INSERT INTO companies (name, ingested_at) VALUES (%s, NOW())
+                ON CONFLICT (name) DO UPDATE SET ingested_at = NOW();
+            """, (name,))
 
+def ingest_version(name: str = ""):
+    """
+    Epoch of the last ingest for `name` (of any company when empty), or None.
+    """
+    ensure_schema()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if name:
+                cur.execute("SELECT EXTRACT(EPOCH FROM ingested_at) FROM companies WHERE name = %s;", (name,))
+            else:
+                cur.execute("SELECT EXTRACT(EPOCH FROM MAX(ingested_at)) FROM companies;")
+            row = cur.fetchone()
+    return float(row[0]) if row and row[0] is not None else None
@@ -0,0 +1,94 @@
+# app/db_functions/db_pool.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool
+
+DB_SETTINGS = {
+    "dbname": os.getenv("DB_NAME", "ragdb"),
+    "user": os.getenv("DB_USER", "postgres"),
+    "password": os.getenv("DB_PASSWORD", "postgres"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "5432")),
+}
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# Connections idle for longer than this are pinged before being handed out.
+HEALTHCHECK_INTERVAL = float(os.getenv("DB_HEALTHCHECK_INTERVAL", "30"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(POOL_MAX)
+_last_used = {}
+
+
+def get_pool() -> pool.ThreadedConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pool.ThreadedConnectionPool(POOL_MIN, POOL_MAX, **DB_SETTINGS)
+    return _pool
+
+
+def _is_healthy(conn) -> bool:
+    if conn.closed:
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0) < HEALTHCHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout():
+    db_pool = get_pool()
+    conn = db_pool.getconn()
+    if not _is_healthy(conn):
+        print("♻️ Replacing unhealthy database connection")
+        db_pool.putconn(conn, close=True)
+        conn = db_pool.getconn()
+    return conn
+
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a pooled connection. Commits on success, rolls back on error and
+    always returns the connection to the pool. Blocks while the pool is exhausted.
+    """
+    _slots.acquire()
+    conn = None
+    try:
+        conn = _checkout()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+    finally:
+        if conn is not None:
+            _last_used[id(conn)] = time.monotonic()
+            get_pool().putconn(conn, close=bool(conn.closed))
+        _slots.release()
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _last_used.clear()
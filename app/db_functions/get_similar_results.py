@@ -27,45 +27,175 @@
 
 #     return [{"link": r[0], "summary": r[1]} for r in results]
 
-import psycopg2
 from psycopg2.extensions import register_adapter, AsIs
 import numpy as np
 
+from app.db_functions.db_pool import get_connection
+from app.db_functions.schema import ensure_schema
+
 def adapt_vector(vec):
     """Convert numpy vector into SQL array string for pgvector."""
     return AsIs(f"'{np.array(vec).tolist()}'")
 
-def search_similar_summaries(query_text, query_embedding, top_k=10):
-    conn = psycopg2.connect(
-        dbname="ragdb",
-        user="postgres",
-        password="postgres",
-        host="localhost",
-        port=5432
-    )
-    cur = conn.cursor()
-
-    # Hybrid search: combine semantic similarity (embedding) and FTS relevance
-    cur.execute("""
-        SELECT link, summary,
-               -- embedding similarity (smaller distance = better, so invert it)
-               (1 - (embedding <-> %s)) AS semantic_score,
-               -- text similarity (Postgres full-text search)
-               ts_rank_cd(to_tsvector('english', summary), plainto_tsquery(%s)) AS lexical_score,
-               -- weighted hybrid score
-               (0.7 * (1 - (embedding <-> %s)) +
-                0.3 * ts_rank_cd(to_tsvector('english', summary), plainto_tsquery(%s))) AS hybrid_score
-        FROM posts
-        WHERE summary @@ plainto_tsquery(%s)  -- ensures at least some keyword overlap
-        ORDER BY hybrid_score DESC
-        LIMIT %s
-    """, (adapt_vector(query_embedding), query_text,
-          adapt_vector(query_embedding), query_text,
-          query_text, top_k))
-
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
+def _apply_search_settings(cur, ef_search=None, probes=None):
+    """Per-query ANN recall/latency knobs; SET LOCAL keeps them scoped to this transaction."""
+    if ef_search is not None:
+        cur.execute("SET LOCAL hnsw.ef_search = %s;", (int(ef_search),))
+    if probes is not None:
+        cur.execute("SET LOCAL ivfflat.probes = %s;", (int(probes),))
+
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def _fusion_score_sql(fusion):
+    if fusion == "rrf":
+        # Reciprocal rank fusion: a side that did not return the row contributes 0
+        return """(%(semantic_weight)s * COALESCE(1.0 / (%(rrf_k)s + f.semantic_rank), 0) +
+                   %(lexical_weight)s * COALESCE(1.0 / (%(rrf_k)s + f.lexical_rank), 0))"""
+    if fusion == "weighted":
+        return """(%(semantic_weight)s * COALESCE(f.semantic_score, 0) +
+                   %(lexical_weight)s * COALESCE(f.lexical_score, 0))"""
+    raise ValueError(f"Unknown fusion method: {fusion}")
+
+
+def _fusion_search(cur, query_text, vector, top_k, semantic_candidates, lexical_candidates,
+                   semantic_weight, lexical_weight, fusion, rrf_k):
+    # Each side is a bounded top-N probe: the ANN index serves the semantic list,
+    # the GIN index on summary_tsv serves the lexical one. Rows found by only one
+    # side are kept, unlike the keyword-filtered "hybrid" mode.
+    # Rows are chunks, so both sides are joined on the chunk id; only the best
+    # chunk of each link is returned.
+    cur.execute(f"""
+        WITH semantic AS (
+            SELECT id, 1 - distance AS semantic_score,
+                   ROW_NUMBER() OVER (ORDER BY distance) AS semantic_rank
+            FROM (
+                SELECT id, embedding <-> %(vector)s AS distance
+                FROM posts
+                ORDER BY embedding <-> %(vector)s
+                LIMIT %(semantic_candidates)s
+            ) nn
+        ),
+        lexical AS (
+            SELECT id, lexical_score,
+                   ROW_NUMBER() OVER (ORDER BY lexical_score DESC) AS lexical_rank
+            FROM (
+                SELECT id, ts_rank_cd(summary_tsv, q) AS lexical_score
+                FROM posts, plainto_tsquery('english', %(query_text)s) AS q
+                WHERE summary_tsv @@ q
+                ORDER BY lexical_score DESC
+                LIMIT %(lexical_candidates)s
+            ) fts
+        ),
+        f AS (
+            SELECT COALESCE(s.id, l.id) AS id,
+                   s.semantic_score, s.semantic_rank,
+                   l.lexical_score, l.lexical_rank
+            FROM semantic s
+            FULL OUTER JOIN lexical l ON s.id = l.id
+        ),
+        scored AS (
+            SELECT DISTINCT ON (p.link)
+                   p.link, p.summary,
+                   COALESCE(f.semantic_score, 0.0) AS semantic_score,
+                   COALESCE(f.lexical_score, 0.0) AS lexical_score,
+                   {_fusion_score_sql(fusion)} AS fused_score
+            FROM f
+            JOIN posts p ON p.id = f.id
+            ORDER BY p.link, fused_score DESC
+        )
+        SELECT link, summary, semantic_score, lexical_score, fused_score
+        FROM scored
+        ORDER BY fused_score DESC
+        LIMIT %(top_k)s
+    """, {
+        "vector": vector,
+        "query_text": query_text,
+        "semantic_candidates": semantic_candidates,
+        "lexical_candidates": lexical_candidates,
+        "semantic_weight": semantic_weight,
+        "lexical_weight": lexical_weight,
+        "rrf_k": rrf_k,
+        "top_k": top_k,
+    })
+
+
+def search_similar_summaries(query_text, query_embedding, top_k=10, *,
+                             mode="hybrid", ef_search=None, probes=None,
+                             semantic_candidates=50, lexical_candidates=50,
+                             semantic_weight=0.7, lexical_weight=0.3,
+                             fusion="rrf", rrf_k=60):
+    """
+    mode="hybrid": weighted semantic + full-text score over keyword matches.
+    mode="vector": pure nearest-neighbour search served by the HNSW/IVFFlat index.
+    mode="fusion": separate top-N vector and full-text candidate sets combined with
+                   `fusion` ("rrf" = reciprocal rank fusion, or "weighted" scores).
+    `ef_search` (HNSW) and `probes` (IVFFlat) trade recall for latency per query.
+    Every mode returns at most one chunk (the best-scoring one) per link.
+    """
+    if fusion not in FUSION_METHODS:
+        # Checked before connecting, and regardless of mode, so a typo fails fast
+        raise ValueError(f"Unknown fusion method: {fusion}")
+    # Hybrid and fusion read summary_tsv; a no-op once this process has migrated
+    ensure_schema()
+    vector = adapt_vector(query_embedding)
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            _apply_search_settings(cur, ef_search, probes)
+
+            if mode == "fusion":
+                _fusion_search(cur, query_text, vector, top_k,
+                               semantic_candidates, lexical_candidates,
+                               semantic_weight, lexical_weight, fusion, rrf_k)
+            elif mode == "vector":
+                # ORDER BY distance + LIMIT is the shape the ANN index can serve;
+                # the candidate set is then cut down to the nearest chunk per link.
+                cur.execute("""
+                    SELECT link, summary, semantic_score, 0.0 AS lexical_score,
+                           semantic_score AS hybrid_score
+                    FROM (
+                        SELECT DISTINCT ON (link) link, summary, 1 - distance AS semantic_score
+                        FROM (
+                            SELECT link, summary, embedding <-> %s AS distance
+                            FROM posts
+                            ORDER BY embedding <-> %s
+                            LIMIT %s
+                        ) nn
+                        ORDER BY link, distance
+                    ) per_link
+                    ORDER BY semantic_score DESC
+                    LIMIT %s
+                """, (vector, vector, max(semantic_candidates, top_k), top_k))
+            elif mode == "hybrid":
+                # Hybrid search: combine semantic similarity (embedding) and FTS relevance
+                # summary_tsv is a stored generated column backed by a GIN index,
+                # so the keyword filter is an index lookup rather than a re-parse.
+                # Only the best-scoring chunk of each link is kept.
+                cur.execute("""
+                    SELECT link, summary, semantic_score, lexical_score, hybrid_score
+                    FROM (
+                        SELECT DISTINCT ON (link) link, summary, semantic_score, lexical_score,
+                               -- weighted hybrid score
+                               (0.7 * semantic_score + 0.3 * lexical_score) AS hybrid_score
+                        FROM (
+                            SELECT link, summary,
+                                   -- embedding similarity (smaller distance = better, so invert it)
+                                   (1 - (embedding <-> %s)) AS semantic_score,
+                                   -- text similarity (Postgres full-text search)
+                                   ts_rank_cd(summary_tsv, q) AS lexical_score
+                            FROM posts, plainto_tsquery('english', %s) AS q
+                            WHERE summary_tsv @@ q  -- ensures at least some keyword overlap
+                        ) scored
+                        ORDER BY link, hybrid_score DESC
+                    ) per_link
+                    ORDER BY hybrid_score DESC
+                    LIMIT %s
+                """, (vector, query_text, top_k))
+            else:
+                raise ValueError(f"Unknown search mode: {mode}")
+
+            results = cur.fetchall()
 
     return [
         {"link": r[0], "summary": r[1], "semantic": r[2], "lexical": r[3], "score": r[4]}
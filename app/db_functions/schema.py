@@ -0,0 +1,230 @@
+# app/db_functions/schema.py
+"""
+Schema + vector index management for the posts table.
+
+The app calls ensure_schema() on startup, which adds missing columns and the
+(link, chunk_index) key to an existing posts table. Indexes are built by hand:
+
+Usage:
+    python -m app.db_functions.schema migrate [--index hnsw|ivfflat]
+    python -m app.db_functions.schema rebuild          # after a bulk ingest
+    python -m app.db_functions.schema normalize        # rows embedded via /api/embeddings
+"""
+import argparse
+import os
+import threading
+from contextlib import contextmanager
+
+from app.db_functions.db_pool import get_connection
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))  # bge-m3
+
+# `<->` (L2 distance) is what search_similar_summaries orders by, so the
+# indexes are built with the matching operator class.
+HNSW_INDEX = "posts_embedding_hnsw_idx"
+IVFFLAT_INDEX = "posts_embedding_ivfflat_idx"
+VECTOR_INDEXES = {"hnsw": HNSW_INDEX, "ivfflat": IVFFLAT_INDEX}
+
+TSV_INDEX = "posts_summary_tsv_idx"
+CHUNK_KEY_INDEX = "posts_link_chunk_idx"
+
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+
+
+@contextmanager
+def _autocommit_connection():
+    # CREATE/REINDEX ... CONCURRENTLY cannot run inside a transaction block.
+    with get_connection() as conn:
+        conn.autocommit = True
+        try:
+            yield conn
+        finally:
+            conn.autocommit = False
+
+
+def create_tables():
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS posts (
+                    id SERIAL PRIMARY KEY,
+                    link TEXT NOT NULL,
+                    chunk_index INT NOT NULL DEFAULT 0,
+                    chunk_hash TEXT,
+                    summary TEXT NOT NULL,
+                    embedding vector({EMBEDDING_DIM})
+                );
+            """)
+            # Rows are keyed per chunk, not per link: older tables had UNIQUE (link),
+            # which kept only the first chunk of every post.
+            cur.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS chunk_index INT NOT NULL DEFAULT 0;")
+            cur.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS chunk_hash TEXT;")
+            cur.execute("ALTER TABLE posts DROP CONSTRAINT IF EXISTS posts_link_key;")
+            cur.execute(f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS {CHUNK_KEY_INDEX}
+                ON posts (link, chunk_index);
+            """)
+            # Filled by Postgres at insert time so searches never re-parse summaries.
+            cur.execute("""
+                ALTER TABLE posts ADD COLUMN IF NOT EXISTS summary_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector('english', summary)) STORED;
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS companies (
+                    id SERIAL PRIMARY KEY,
+                    name TEXT UNIQUE NOT NULL,
+                    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+                );
+            """)
+            # Bumped by every ingest; answer caches in other processes compare it
+            cur.execute("ALTER TABLE companies ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMP;")
+
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    """
+    Run create_tables() once per process. Inserts and searches rely on the
+    chunk_index/chunk_hash/summary_tsv columns and the (link, chunk_index)
+    key, which tables created before them lack.
+    """
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        try:
+            create_tables()
+        except Exception as e:
+            raise RuntimeError(
+                "Could not bring the posts table up to date; "
+                "run `python -m app.db_functions.schema migrate`"
+            ) from e
+        _schema_ready = True
+        print("✅ Database schema is up to date")
+
+
+def _ivfflat_lists(cur) -> int:
+    # pgvector guidance: rows / 1000 lists up to 1M rows, at least a handful.
+    cur.execute("SELECT COUNT(*) FROM posts;")
+    rows = cur.fetchone()[0]
+    return max(10, rows // 1000)
+
+
+def create_vector_index(index_type: str = "hnsw"):
+    """
+    Create the ANN index on posts.embedding if it does not exist yet.
+    """
+    if index_type not in VECTOR_INDEXES:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    with _autocommit_connection() as conn:
+        with conn.cursor() as cur:
+            if index_type == "hnsw":
+                cur.execute(f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS {HNSW_INDEX}
+                    ON posts USING hnsw (embedding vector_l2_ops)
+                    WITH (m = %s, ef_construction = %s);
+                """, (HNSW_M, HNSW_EF_CONSTRUCTION))
+            else:
+                cur.execute(f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS {IVFFLAT_INDEX}
+                    ON posts USING ivfflat (embedding vector_l2_ops)
+                    WITH (lists = %s);
+                """, (_ivfflat_lists(cur),))
+    print(f"✅ Vector index ready: {VECTOR_INDEXES[index_type]}")
+
+
+def create_text_index():
+    """
+    GIN index over the generated summary_tsv column used by hybrid search.
+    """
+    with _autocommit_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {TSV_INDEX}
+                ON posts USING gin (summary_tsv);
+            """)
+    print(f"✅ Text index ready: {TSV_INDEX}")
+
+
+def drop_vector_index(index_type: str):
+    with _autocommit_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEXES[index_type]};")
+
+
+def existing_vector_indexes() -> list[str]:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT indexname FROM pg_indexes
+                WHERE tablename = 'posts' AND indexname = ANY(%s);
+            """, (list(VECTOR_INDEXES.values()),))
+            return [r[0] for r in cur.fetchall()]
+
+
+def rebuild_indexes():
+    """
+    Rebuild the vector indexes and refresh planner statistics.
+    IVFFlat is recreated so its list count and centroids follow the new row count.
+    """
+    present = existing_vector_indexes()
+    if IVFFLAT_INDEX in present:
+        drop_vector_index("ivfflat")
+        create_vector_index("ivfflat")
+
+    with _autocommit_connection() as conn:
+        with conn.cursor() as cur:
+            if HNSW_INDEX in present:
+                print(f"🔄 Reindexing {HNSW_INDEX}")
+                cur.execute(f"REINDEX INDEX CONCURRENTLY {HNSW_INDEX};")
+            cur.execute("ANALYZE posts;")
+    print("✅ Indexes rebuilt")
+
+
+def normalize_embeddings():
+    """
+    Scale stored embeddings to unit length. Rows written before ingestion moved
+    to Ollama's /api/embed came from /api/embeddings, which does not normalize,
+    so their L2 distances are not comparable with new rows or query vectors.
+    Same model, same direction: rescaling matches a re-embed without calling
+    Ollama. Needs pgvector >= 0.7 for l2_normalize/vector_norm.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE posts SET embedding = l2_normalize(embedding)
+                WHERE abs(vector_norm(embedding) - 1) > 1e-3;
+            """)
+            updated = cur.rowcount
+    print(f"📐 Normalized {updated} embeddings")
+    if updated:
+        rebuild_indexes()
+
+
+def migrate(index_type: str = "hnsw"):
+    create_tables()
+    create_vector_index(index_type)
+    create_text_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the posts schema and vector indexes")
+    parser.add_argument("command", choices=["migrate", "rebuild", "normalize"])
+    parser.add_argument("--index", choices=list(VECTOR_INDEXES), default="hnsw")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate(args.index)
+    elif args.command == "normalize":
+        normalize_embeddings()
+    else:
+        rebuild_indexes()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
+from typing import Optional
+
+from app.scrapers.browser_pool import BrowserPool, get_browser_pool
 from app.scrapers.gfg_scraper import GfgScraper
 from app.scrapers.leetcode_scraper import LeetCodeScraper
 # from app.scrapers.leetcode_scraper import LeetcodeScraper
 
-def get_scraper(source: str):
+def get_scraper(source: str, browser_pool: Optional[BrowserPool] = None):
+    # All scrapers share one warm browser unless a pool is passed explicitly
+    browser_pool = browser_pool or get_browser_pool()
     if source.lower() == "gfg":
-        return GfgScraper()
+        return GfgScraper(browser_pool=browser_pool)
     elif source.lower() == "leetcode":
-        return LeetCodeScraper()
+        return LeetCodeScraper(browser_pool=browser_pool)
     else:
-        raise ValueError("Unknown scraper source")
\ No newline at end of file
+        raise ValueError("Unknown scraper source")
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
 
 class ScraperInterface(ABC):
     @abstractmethod
@@ -6,5 +7,14 @@ class ScraperInterface(ABC):
         pass
 
     @abstractmethod
-    async def scrape_multiple_posts(self, links: list[dict]) -> list[dict]:
-        pass
\ No newline at end of file
+    async def scrape_multiple_posts(
+        self,
+        links: list[dict],
+        concurrency_limit: int = 5,
+        on_post: Optional[Callable[[dict], Awaitable[None]]] = None
+    ) -> list[dict]:
+        """
+        Scrape `links` and return posts with content. If `on_post` is given it is
+        awaited with each post as soon as that post is scraped.
+        """
+        pass
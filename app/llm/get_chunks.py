@@ -1,23 +1,104 @@
-from transformers import AutoTokenizer
+import re
+from functools import lru_cache
 
-# bge-m3 is based on a MiniLM-like encoder
-tokenizer = AutoTokenizer.from_pretrained("BAAI/bge-m3")
+TOKENIZER_NAME = "BAAI/bge-m3"
 
-def chunk_text_by_tokens(text, max_tokens=1024):
-    sentences = text.split(". ")
-    chunks, current = [], ""
 
-    for sentence in sentences:
-        tentative = current + sentence + ". "
-        token_len = len(tokenizer.encode(tentative, truncation=False))
-        if token_len <= max_tokens:
-            current = tentative
-        else:
-            if current:
-                chunks.append(current.strip())
-            current = sentence + ". "
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    # Loaded on first use: importing transformers and the bge-m3 vocab takes
+    # seconds, which callers that never chunk should not pay.
+    from transformers import AutoTokenizer
 
-    if current:
-        chunks.append(current.strip())
+    # bge-m3 is based on a MiniLM-like encoder
+    return AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+
+
+# Sentence ends (". ", "! ", "? ") and line breaks both delimit units, so
+# newline-separated GFG content no longer collapses into one huge "sentence".
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+
+def _sentence_spans(text):
+    spans, start = [], 0
+    for m in _SENTENCE_BOUNDARY.finditer(text):
+        if text[start:m.start()].strip():
+            spans.append((start, m.start()))
+        start = m.end()
+    if text[start:].strip():
+        spans.append((start, len(text)))
+    return spans
+
+
+def _units(spans, offsets_per_span, max_tokens):
+    """
+    (start, end, n_tokens) units for one document. Sentences longer than
+    `max_tokens` are cut at token boundaries using the offset mapping.
+    """
+    units = []
+    for (start, _end), offsets in zip(spans, offsets_per_span):
+        n = len(offsets)
+        if n <= max_tokens:
+            units.append((start, _end, n))
+            continue
+        for i in range(0, n, max_tokens):
+            piece = offsets[i:i + max_tokens]
+            units.append((start + piece[0][0], start + piece[-1][1], len(piece)))
+    return units
+
+
+def _pack(text, units, max_tokens, overlap_tokens):
+    chunks = []
+    current, current_tokens = [], 0
 
+    for unit in units:
+        n = unit[2]
+        if current and current_tokens + n > max_tokens:
+            chunks.append(text[current[0][0]:current[-1][1]].strip())
+            # carry trailing units forward as overlap
+            carried, carried_tokens = [], 0
+            for prev in reversed(current):
+                if carried_tokens + prev[2] > overlap_tokens or carried_tokens + prev[2] + n > max_tokens:
+                    break
+                carried.insert(0, prev)
+                carried_tokens += prev[2]
+            current, current_tokens = carried, carried_tokens
+        current.append(unit)
+        current_tokens += n
+
+    if current:
+        chunks.append(text[current[0][0]:current[-1][1]].strip())
     return chunks
+
+
+def chunk_texts_by_tokens(texts, max_tokens=1024, overlap_tokens=0):
+    """
+    Chunk many documents with a single batched tokenizer call.
+    Each sentence is tokenized once; chunks are built by summing token counts,
+    with up to `overlap_tokens` of trailing sentences repeated in the next chunk.
+    Returns one list of chunks per input text.
+    """
+    spans_per_doc = [_sentence_spans(text) for text in texts]
+    sentences = [text[s:e] for text, spans in zip(texts, spans_per_doc) for s, e in spans]
+    if not sentences:
+        return [[] for _ in texts]
+
+    encoded = get_tokenizer()(
+        sentences,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        truncation=False,
+    )
+    offsets = encoded["offset_mapping"]
+
+    results, cursor = [], 0
+    for text, spans in zip(texts, spans_per_doc):
+        doc_offsets = offsets[cursor:cursor + len(spans)]
+        cursor += len(spans)
+        units = _units(spans, doc_offsets, max_tokens)
+        results.append(_pack(text, units, max_tokens, overlap_tokens))
+    return results
+
+
+def chunk_text_by_tokens(text, max_tokens=1024, overlap_tokens=0):
+    return chunk_texts_by_tokens([text], max_tokens=max_tokens, overlap_tokens=overlap_tokens)[0]
@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+from app.llm import get_chunks
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word; stands in for bge-m3."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, add_special_tokens=False, return_offsets_mapping=False, truncation=False):
+        self.calls += 1
+        offsets = [[m.span() for m in re.finditer(r"\S+", text)] for text in texts]
+        return {"input_ids": [list(range(len(o))) for o in offsets], "offset_mapping": offsets}
+
+
+@pytest.fixture
+def tokenizer(monkeypatch):
+    tok = WordTokenizer()
+    monkeypatch.setattr(get_chunks, "get_tokenizer", lambda: tok)
+    return tok
+
+
+def _words(chunks):
+    return [w for chunk in chunks for w in chunk.split()]
+
+
+def test_short_text_is_one_chunk(tokenizer):
+    assert get_chunks.chunk_text_by_tokens("One two. Three four.", max_tokens=10) == ["One two. Three four."]
+
+
+def test_empty_text_has_no_chunks(tokenizer):
+    assert get_chunks.chunk_texts_by_tokens(["", "   "]) == [[], []]
+
+
+def test_chunks_respect_budget_and_keep_order(tokenizer):
+    text = " ".join(f"s{i} a b." for i in range(20))
+    chunks = get_chunks.chunk_text_by_tokens(text, max_tokens=7)
+    assert len(chunks) > 1
+    assert all(len(c.split()) <= 7 for c in chunks)
+    assert _words(chunks) == text.split()
+
+
+def test_newlines_delimit_sentences(tokenizer):
+    chunks = get_chunks.chunk_text_by_tokens("a b c\nd e f\ng h i", max_tokens=4)
+    assert chunks == ["a b c", "d e f", "g h i"]
+
+
+def test_long_sentence_is_cut_at_token_boundaries(tokenizer):
+    text = " ".join(f"w{i}" for i in range(10))
+    chunks = get_chunks.chunk_text_by_tokens(text, max_tokens=4)
+    assert chunks == ["w0 w1 w2 w3", "w4 w5 w6 w7", "w8 w9"]
+
+
+def test_overlap_repeats_trailing_sentences(tokenizer):
+    chunks = get_chunks.chunk_text_by_tokens("a b. c d. e f.", max_tokens=4, overlap_tokens=2)
+    assert chunks == ["a b. c d.", "c d. e f."]
+
+
+def test_batch_matches_single_calls_with_one_tokenizer_call(tokenizer):
+    texts = ["x y. z w. q r.", "one.", "alpha beta gamma. delta."]
+    batched = get_chunks.chunk_texts_by_tokens(texts, max_tokens=3)
+    assert tokenizer.calls == 1
+    assert batched == [get_chunks.chunk_text_by_tokens(t, max_tokens=3) for t in texts]
@@ -0,0 +1,232 @@
+# app/llm/llm_client.py
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+
+def _normalize_host(host: str) -> str:
+    """
+    Base URL for Ollama. OLLAMA_HOST is often set as "host:port" (the ollama
+    CLI and ollama.Client accept that), which is not a valid URL prefix.
+    """
+    host = host.strip()
+    if "://" not in host:
+        host = f"http://{host}"
+    return host.rstrip("/")
+
+
+OLLAMA_HOST = _normalize_host(os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF = float(os.getenv("LLM_BACKOFF", "0.5"))
+
+# Worth retrying: overloaded or restarting Ollama
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class LLMClient:
+    """
+    Async client for Ollama's /api/generate.
+
+    - one keep-alive aiohttp session (at most `max_connections` sockets)
+    - at most `max_concurrency` generations in flight; the rest wait
+    - total/connect timeouts per request, and up to `max_retries` retries
+      with exponential backoff on connection errors, timeouts and 429/5xx
+    - stream() yields tokens as Ollama produces them; it only retries
+      before the first token, since a partial answer cannot be replayed
+
+    The session and semaphore belong to the event loop they were created on;
+    they are rebuilt if the client is used from a different loop, and the old
+    session is closed first.
+    """
+
+    def __init__(self, host: str = OLLAMA_HOST, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_connections: int = LLM_MAX_CONNECTIONS, timeout: float = LLM_TIMEOUT,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT, max_retries: int = LLM_MAX_RETRIES,
+                 backoff: float = LLM_BACKOFF):
+        self.host = _normalize_host(host)
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._session = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+
+    async def _bind(self):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            await self._release_session()
+        # Re-checked after the await: a concurrent caller may have rebuilt it
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+            )
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session, self._sem
+
+    async def _release_session(self) -> None:
+        """
+        Close the current session, on its own loop when that loop is still
+        running elsewhere (e.g. a BackgroundLoop thread), otherwise here: a
+        session whose loop has closed can still be marked closed, which
+        releases its connector.
+        """
+        session, old_loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session is None or session.closed:
+            return
+        try:
+            if old_loop is not None and old_loop is not asyncio.get_running_loop() and old_loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), old_loop))
+            else:
+                await session.close()
+        except Exception as e:
+            print(f"⚠️ Failed to close previous LLM session: {e!r}")
+
+    async def generate(self, prompt: str, model: str = "gemma3:1b",
+                       options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Full (non-streamed) completion for `prompt`. Raises LLMError once
+        retries are exhausted.
+        """
+        import aiohttp
+
+        session, sem = await self._bind()
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+
+        async with sem:
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        async with session.post(f"{self.host}/api/generate", json=payload) as resp:
+                            if resp.status == 200:
+                                data = await resp.json()
+                                self.requests += 1
+                                return data.get("response", "")
+                            body = await resp.text()
+                            if resp.status not in _RETRY_STATUSES:
+                                self.failures += 1
+                                raise LLMError(f"Ollama returned HTTP {resp.status}: {body[:200]}")
+                            error = f"HTTP {resp.status}"
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        error = repr(e)
+                    await self._backoff(attempt, error)
+            finally:
+                self.in_flight -= 1
+                self.total_seconds += time.perf_counter() - start
+
+    async def stream(self, prompt: str, model: str = "gemma3:1b",
+                     options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Yield the completion for `prompt` piece by piece. The timeout applies
+        between chunks rather than to the whole generation.
+        """
+        import aiohttp
+
+        session, sem = await self._bind()
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        timeout = aiohttp.ClientTimeout(total=None, connect=self.connect_timeout, sock_read=self.timeout)
+
+        async with sem:
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    started = False
+                    try:
+                        async with session.post(f"{self.host}/api/generate", json=payload, timeout=timeout) as resp:
+                            if resp.status == 200:
+                                # Ollama streams one JSON object per line
+                                async for line in resp.content:
+                                    if not line.strip():
+                                        continue
+                                    data = json.loads(line)
+                                    if data.get("error"):
+                                        self.failures += 1
+                                        raise LLMError(f"Ollama stream error: {data['error']}")
+                                    piece = data.get("response", "")
+                                    if piece:
+                                        started = True
+                                        yield piece
+                                    if data.get("done"):
+                                        break
+                                self.requests += 1
+                                return
+                            body = await resp.text()
+                            if resp.status not in _RETRY_STATUSES:
+                                self.failures += 1
+                                raise LLMError(f"Ollama returned HTTP {resp.status}: {body[:200]}")
+                            error = f"HTTP {resp.status}"
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        if started:
+                            self.failures += 1
+                            raise LLMError(f"stream interrupted: {e!r}") from e
+                        error = repr(e)
+                    await self._backoff(attempt, error)
+            finally:
+                self.in_flight -= 1
+                self.total_seconds += time.perf_counter() - start
+
+    async def _backoff(self, attempt: int, error: str) -> None:
+        if attempt == self.max_retries:
+            self.failures += 1
+            raise LLMError(f"generate failed after {attempt + 1} attempts: {error}")
+        self.retries += 1
+        delay = self.backoff * 2 ** attempt
+        print(f"⚠️ LLM call failed ({error}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "avg_seconds": round(self.total_seconds / self.requests, 3) if self.requests else 0.0,
+        }
+
+    async def close(self) -> None:
+        await self._release_session()
+
+
+_default_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = LLMClient()
+    return _default_client
+
+
+async def close_llm_client() -> None:
+    if _default_client is not None:
+        await _default_client.close()
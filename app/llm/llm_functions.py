@@ -1,131 +1,120 @@
 # ollama_filter.py
-import time
-import ollama
-import re
-import aiohttp
 import asyncio
-import re
 from asyncio import Semaphore
+from functools import lru_cache
 import requests
 import numpy as np
 
+from app.llm.embedding_cache import get_embedding_cache
+from app.llm.llm_client import LLM_TIMEOUT, OLLAMA_HOST, get_llm_client
+
+
+@lru_cache(maxsize=1)
+def get_ollama_client():
+    # Created on first use so importing this module stays cheap.
+    import ollama
+    return ollama.Client(host=OLLAMA_HOST)
+
+
 def normalize(vec):
     norm = np.linalg.norm(vec)
     return [v / norm for v in vec] if norm else vec
 
 
-async def is_relevant(link, company_name, role, session, sem):
-    time.sleep(1)  # Simulate delay for relevance check
-    title = link["title"]
-
-    prompt = f"""You are a helpful assistant. Your task is to determine whether the following job interview post title is directly relevant to the company and the user's role.
-Answer only with "YES" or "NO".
-
-Title: {title}
-Company: {company_name}
-Role: {role}"""
-
-    async with sem:
-        print(f"🔍 Checking relevance for: {title}")
-        try:
-            async with session.post(
-                "http://localhost:11434/api/generate",
-                json={"model": "llama3.2:1b", "prompt": prompt, "stream": False},
-                timeout=30
-            ) as resp:
-                data = await resp.json()
-                content = data["response"]
-                result = re.sub(r"<think>.*?</think>", "", content, flags=re.IGNORECASE | re.DOTALL).strip().upper()
-                return link if result == "YES" else None
-        except Exception as e:
-            print(f"❌ Error for title: {title} -> {e}")
-            return None
-
 async def async_filter_links(links, company_name, role, max_results=15):
-    filtered_links = []
-    sem = Semaphore(1)  # limit 1 concurrent requests
-    async with aiohttp.ClientSession() as session:
-        tasks = [
-            is_relevant(link, company_name, role, session, sem)
-            for link in links
-        ]
-        for future in asyncio.as_completed(tasks):
-            result = await future
-            if result:
-                filtered_links.append(result)
-                print(len(filtered_links), "relevant links found so far.")
-                if len(filtered_links) >= max_results:
-                    print("🔍 Reached limit of 10 relevant links.")
-                    break
-    return filtered_links
+    """
+    Links whose titles are relevant to the company and role, in input order.
+    Obvious titles are settled by keyword rules, verdicts are memoized, and
+    the rest are classified many titles per LLM call (see relevance_filter).
+    """
+    from app.llm.relevance_filter import get_relevance_filter
+    return await get_relevance_filter().filter(links, company_name, role, max_results=max_results)
 
 
 def filter_links(links, company_name, role):
-    counter = 0
-    filtered_links = []
-
-    for link in links:
-        title = link['title']
-        prompt = f"""You are a helpful assistant. Your task is to determine whether the following job interview post title is directly relevant to the company and the user's role.
-        Answer only with "YES" or "NO".
-
-        Title: {title}
-        Company: {company_name}
-        Role: {role}
-        """
-        print(f"🔍 Checking relevance for: {title}")
-        response = ollama.chat(
-            model='llama3.2:1b',
-            messages=[{"role": "user", "content": prompt}]
-        )
-        result = response['message']['content'].strip().upper()
-        result = re.sub(r"<think>.*?</think>", "", result, flags=re.IGNORECASE | re.DOTALL).strip()
-        if result == "YES":
-            filtered_links.append(link)
-            counter += 1
-
-        if counter >= 10:
-            print("🔍 Reached limit of 10 relevant links.")
-            break
-
-    return filtered_links
+    return asyncio.run(async_filter_links(links, company_name, role, max_results=10))
 
 
 def summarize_content(content):
-    time.sleep(1)  # Simulate delay for summarization
-    prompt = f"""You are a helpful assistant. Your task is to summarize the following job interview post content in a concise manner.
-    Provide a summary that captures the key points and insights.
-
-    Content: {content}
     """
+    Sync wrapper around the shared Summarizer (see summarizer.py); async
+    callers should await get_summarizer().summarize / summarize_many instead.
+    """
+    from app.llm.summarizer import get_summarizer
     print("📝 Summarizing content...")
-    response = ollama.chat(
-        model='llama3.2:1b',
-        messages=[{"role": "user", "content": prompt}]
-    )
-    summary = response['message']['content'].strip()
-    summary = re.sub(r"<think>.*?</think>", "", summary, flags=re.IGNORECASE | re.DOTALL).strip()
-    return summary
+    return asyncio.run(get_summarizer().summarize(content))
+
 
+EMBEDDING_MODEL = 'bge-m3:latest'
 
 
 async def create_embeddings(content):
+    # Uses the same /api/embed endpoint as create_embeddings_batch so query
+    # and document vectors land in the same (normalized) space. Posts embedded
+    # earlier through /api/embeddings are not unit length; run
+    # `python -m app.db_functions.schema normalize` once to bring them in line.
     loop = asyncio.get_event_loop()
     response = await loop.run_in_executor(
         None,
-        lambda: ollama.embeddings(
-            model='bge-m3:latest',
-            prompt=content
+        lambda: get_ollama_client().embed(
+            model=EMBEDDING_MODEL,
+            input=content
         )
     )
-    embedding = response['embedding']
+    embedding = response['embeddings'][0]
     return embedding
 
 
-def generate_answer_with_context(query, context_chunks, model="gemma3:1b"):
+async def create_query_embedding(query):
+    """
+    Embedding for a chat query, served from the query-embedding cache when the
+    same (normalized) question was embedded before with the same model.
+    """
+    cache = get_embedding_cache()
+    embedding = cache.get(query, EMBEDDING_MODEL)
+    if embedding is None:
+        embedding = await create_embeddings(query)
+        cache.put(query, EMBEDDING_MODEL, embedding)
+    return embedding
+
+
+async def create_embeddings_batch(texts, batch_size=32, max_in_flight=4):
+    """
+    Embed many texts with one Ollama request per batch of `batch_size` texts.
+    At most `max_in_flight` batches are outstanding at once.
+    Returns embeddings in the same order as `texts`.
+    """
+    if not texts:
+        return []
+
+    loop = asyncio.get_event_loop()
+    sem = Semaphore(max_in_flight)
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    async def embed_batch(batch):
+        async with sem:
+            response = await loop.run_in_executor(
+                None,
+                lambda: get_ollama_client().embed(
+                    model=EMBEDDING_MODEL,
+                    input=batch
+                )
+            )
+            return response['embeddings']
+
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    return [embedding for batch in results for embedding in batch]
+
+
+@lru_cache(maxsize=1)
+def _get_requests_session():
+    return requests.Session()
+
+
+def _build_context_prompt(query, context_chunks):
     context_text = "\n\n".join([chunk["summary"] for chunk in context_chunks])
 
-    prompt = f"""
+    return f"""
         You are a helpful assistant. Use the context below to answer the user's question.
 
         Only return an answer if the context contains **directly relevant information** to the user's query.  
@@ -140,10 +129,33 @@ def generate_answer_with_context(query, context_chunks, model="gemma3:1b"):
 
         ANSWER:"""
 
-    res = requests.post("http://localhost:11434/api/generate", json={
+
+def generate_answer_with_context(query, context_chunks, model="gemma3:1b"):
+    """
+    Blocking variant for sync callers; async code should await
+    async_generate_answer_with_context so the event loop stays free.
+    """
+    res = _get_requests_session().post(f"{OLLAMA_HOST}/api/generate", json={
         "model": model,
-        "prompt": prompt,
+        "prompt": _build_context_prompt(query, context_chunks),
         "stream": False
-    })
+    }, timeout=LLM_TIMEOUT)
     result = res.json()["response"]
-    return result
\ No newline at end of file
+    return result
+
+
+async def async_generate_answer_with_context(query, context_chunks, model="gemma3:1b"):
+    """
+    Same prompt as generate_answer_with_context, sent through the shared
+    pooled LLMClient (keep-alive session, timeouts, retries, concurrency limit).
+    """
+    return await get_llm_client().generate(_build_context_prompt(query, context_chunks), model=model)
+
+
+async def stream_answer_with_context(query, context_chunks, model="gemma3:1b"):
+    """
+    Streaming counterpart of async_generate_answer_with_context: yields the
+    answer in pieces as Ollama generates it.
+    """
+    async for piece in get_llm_client().stream(_build_context_prompt(query, context_chunks), model=model):
+        yield piece
@@ -0,0 +1,264 @@
+# app/llm/relevance_filter.py
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+RELEVANCE_MODEL = os.getenv("RELEVANCE_MODEL", "llama3.2:1b")
+RELEVANCE_BATCH_SIZE = int(os.getenv("RELEVANCE_BATCH_SIZE", "20"))
+RELEVANCE_CONCURRENCY = int(os.getenv("RELEVANCE_CONCURRENCY", "4"))
+RELEVANCE_CACHE_SIZE = int(os.getenv("RELEVANCE_CACHE_SIZE", "10000"))
+RELEVANCE_TIMEOUT = float(os.getenv("RELEVANCE_TIMEOUT", "60"))
+
+# A title with none of these that also skips the company name is not a write-up
+INTERVIEW_KEYWORDS = ("interview", "experience", "round", "onsite", "on-site", "oa", "hiring", "offer")
+# Posts that mention the company but are not about interviewing there
+OFF_TOPIC_KEYWORDS = ("salary", "layoff", "stock price", "share price")
+
+_VERDICT_RE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*(YES|NO)\b", re.IGNORECASE | re.MULTILINE)
+
+
+def _compact(text: str) -> str:
+    """Lowercase and drop everything but letters and digits ("SDE-2" -> "sde2")."""
+    return re.sub(r"[^a-z0-9]", "", (text or "").lower())
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def _mentions(tokens: List[str], phrase: str) -> bool:
+    """
+    True when some run of whole tokens spells `phrase`, ignoring spacing and
+    punctuation: "JP Morgan" matches "jpmorgan", "SDE-2" matches "sde 2",
+    but "Meta" does not match "metadata".
+    """
+    key = _compact(phrase)
+    for start in range(len(tokens)):
+        joined = ""
+        for token in tokens[start:]:
+            joined += token
+            if joined == key:
+                return True
+            if not key.startswith(joined):
+                break
+    return False
+
+
+def prefilter(title: str, company_name: str, role: str) -> Optional[bool]:
+    """
+    Cheap keyword rules that settle obvious titles without the LLM.
+    Returns True/False, or None when the LLM has to decide.
+    """
+    lowered = (title or "").lower()
+    if not lowered.strip():
+        return False
+    if any(k in lowered for k in OFF_TOPIC_KEYWORDS):
+        return False
+    tokens = _tokens(title)
+    words = set(tokens)
+    about_interview = any(k in words if k.isalnum() else k in lowered for k in INTERVIEW_KEYWORDS)
+    if not _mentions(tokens, company_name):
+        return None if about_interview else False
+    # Without a role to check, mentioning the company alone is not enough
+    if _compact(role) and _mentions(tokens, role):
+        return True
+    return None
+
+
+def _memo_key(title: str, company_name: str, role: str) -> Tuple[str, str, str]:
+    return (" ".join((title or "").lower().split()), _compact(company_name), _compact(role))
+
+
+def _build_prompt(titles: List[str], company_name: str, role: str) -> str:
+    numbered = "\n".join(f"{i}. {title}" for i, title in enumerate(titles, 1))
+    return f"""You are a helpful assistant. For each job interview post title below, decide whether it is directly relevant to the company and the user's role.
+Answer with one line per title in the form "<number>: YES" or "<number>: NO" and nothing else.
+
+Company: {company_name}
+Role: {role}
+
+Titles:
+{numbered}"""
+
+
+def parse_verdicts(text: str, count: int) -> Dict[int, bool]:
+    """
+    {0-based position: verdict} for every numbered line the model answered.
+    """
+    text = re.sub(r"<think>.*?</think>", "", text or "", flags=re.IGNORECASE | re.DOTALL)
+    verdicts = {}
+    for number, answer in _VERDICT_RE.findall(text):
+        index = int(number) - 1
+        if 0 <= index < count and index not in verdicts:
+            verdicts[index] = answer.upper() == "YES"
+    return verdicts
+
+
+class RelevanceFilter:
+    """
+    Classifies link titles as relevant to (company, role).
+
+    - titles settled by `prefilter` never reach the LLM
+    - verdicts are memoized on (title, company, role) in a bounded LRU
+    - the rest are sent `batch_size` titles per /api/generate call, with at
+      most `concurrency` calls in flight; titles a batch answer misses are
+      retried one per call
+    """
+
+    def __init__(self, model: str = RELEVANCE_MODEL, batch_size: int = RELEVANCE_BATCH_SIZE,
+                 concurrency: int = RELEVANCE_CONCURRENCY, max_entries: int = RELEVANCE_CACHE_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[Tuple[str, str, str], bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memo_hits = 0
+        self.prefiltered = 0
+        self.llm_calls = 0
+        self.llm_titles = 0
+        self.llm_errors = 0
+
+    def _recall(self, key: Tuple[str, str, str]) -> Optional[bool]:
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.memo_hits += 1
+                return self._memo[key]
+        return None
+
+    def _remember(self, key: Tuple[str, str, str], verdict: bool) -> None:
+        with self._lock:
+            self._memo[key] = verdict
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+    async def _ask(self, session, sem: asyncio.Semaphore, titles: List[str],
+                   company_name: str, role: str) -> Dict[int, bool]:
+        import aiohttp
+        from app.llm.llm_client import OLLAMA_HOST
+
+        async with sem:
+            self.llm_calls += 1
+            self.llm_titles += len(titles)
+            try:
+                async with session.post(
+                    f"{OLLAMA_HOST}/api/generate",
+                    json={
+                        "model": self.model,
+                        "prompt": _build_prompt(titles, company_name, role),
+                        "stream": False,
+                        "options": {"temperature": 0},
+                    },
+                    timeout=aiohttp.ClientTimeout(total=RELEVANCE_TIMEOUT),
+                ) as resp:
+                    data = await resp.json()
+                return parse_verdicts(data.get("response", ""), len(titles))
+            except Exception as e:
+                self.llm_errors += 1
+                print(f"❌ Relevance check failed for {len(titles)} titles -> {e!r}")
+                return {}
+
+    async def _classify_batch(self, session, sem, batch: List[Tuple[int, dict]],
+                              company_name: str, role: str) -> List[Tuple[int, bool]]:
+        titles = [link["title"] for _, link in batch]
+        verdicts = await self._ask(session, sem, titles, company_name, role)
+        missing = [i for i in range(len(batch)) if i not in verdicts]
+        if missing and len(batch) > 1:
+            retries = await asyncio.gather(*(
+                self._ask(session, sem, [titles[i]], company_name, role) for i in missing
+            ))
+            for i, answer in zip(missing, retries):
+                if 0 in answer:
+                    verdicts[i] = answer[0]
+
+        results = []
+        for i, (position, link) in enumerate(batch):
+            if i in verdicts:
+                self._remember(_memo_key(link["title"], company_name, role), verdicts[i])
+                results.append((position, verdicts[i]))
+            else:
+                results.append((position, False))  # unanswered: dropped, not memoized
+        return results
+
+    async def filter(self, links: List[dict], company_name: str, role: str,
+                     max_results: Optional[int] = None) -> List[dict]:
+        """
+        Relevant links in their original order. With `max_results`, pending
+        LLM calls are cancelled as soon as that many relevant links are known.
+        """
+        import aiohttp
+
+        start = time.perf_counter()
+        relevant: Dict[int, dict] = {}
+        undecided: List[Tuple[int, dict]] = []
+        for position, link in enumerate(links):
+            title = link.get("title", "")
+            verdict = self._recall(_memo_key(title, company_name, role))
+            if verdict is None:
+                verdict = prefilter(title, company_name, role)
+                if verdict is not None:
+                    self.prefiltered += 1
+            if verdict is None:
+                undecided.append((position, link))
+            elif verdict:
+                relevant[position] = link
+
+        def enough() -> bool:
+            return max_results is not None and len(relevant) >= max_results
+
+        if undecided and not enough():
+            batches = [undecided[i:i + self.batch_size] for i in range(0, len(undecided), self.batch_size)]
+            sem = asyncio.Semaphore(self.concurrency)
+            async with aiohttp.ClientSession() as session:
+                tasks = [
+                    asyncio.create_task(self._classify_batch(session, sem, batch, company_name, role))
+                    for batch in batches
+                ]
+                try:
+                    for future in asyncio.as_completed(tasks):
+                        for position, verdict in await future:
+                            if verdict:
+                                relevant[position] = links[position]
+                        if enough():
+                            print(f"🔍 Reached limit of {max_results} relevant links.")
+                            break
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+        result = [relevant[p] for p in sorted(relevant)]
+        if max_results is not None:
+            result = result[:max_results]
+        print(f"✅ {len(result)} of {len(links)} links relevant in {time.perf_counter() - start:.1f}s: {self.stats()}")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memo_hits": self.memo_hits,
+            "prefiltered": self.prefiltered,
+            "llm_calls": self.llm_calls,
+            "llm_titles": self.llm_titles,
+            "llm_errors": self.llm_errors,
+            "memo_entries": len(self._memo),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+
+
+_default_filter: Optional[RelevanceFilter] = None
+
+
+def get_relevance_filter() -> RelevanceFilter:
+    global _default_filter
+    if _default_filter is None:
+        _default_filter = RelevanceFilter()
+    return _default_filter
@@ -0,0 +1,37 @@
+from app.llm.relevance_filter import parse_verdicts, prefilter
+
+
+def test_prefilter_accepts_company_and_role_on_whole_tokens():
+    assert prefilter("JPMorgan SDE 2 interview experience", "JP Morgan", "SDE-2") is True
+    assert prefilter("Meta SDE2 onsite", "Meta", "SDE-2") is True
+
+
+def test_prefilter_does_not_match_company_inside_a_word():
+    # "Meta" inside "Metadata" is not a mention; the title is still about interviews
+    assert prefilter("Metadata service interview", "Meta", "SDE") is None
+    assert prefilter("Metadata service design", "Meta", "SDE") is False
+
+
+def test_prefilter_rejects_off_topic_and_empty_titles():
+    assert prefilter("Amazon salary negotiation", "Amazon", "SDE") is False
+    assert prefilter("   ", "Amazon", "SDE") is False
+
+
+def test_prefilter_leaves_unclear_titles_to_the_llm():
+    assert prefilter("Google interview", "Google", "") is None
+    assert prefilter("Google L4 onsite", "Google", "SDE-2") is None
+
+
+def test_parse_verdicts_reads_numbered_answers():
+    text = "1: YES\n2. no\n3) Yes - relevant\n"
+    assert parse_verdicts(text, 3) == {0: True, 1: False, 2: True}
+
+
+def test_parse_verdicts_ignores_think_blocks_out_of_range_and_repeats():
+    text = "<think>1: NO</think>\n1: YES\n1: NO\n7: YES\nmaybe 2"
+    assert parse_verdicts(text, 2) == {0: True}
+
+
+def test_parse_verdicts_handles_empty_response():
+    assert parse_verdicts("", 3) == {}
+    assert parse_verdicts(None, 3) == {}
@@ -0,0 +1,254 @@
+# app/llm/summarizer.py
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama3.2:1b")
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+# Posts longer than this (in tokenizer tokens) are summarized map-reduce style
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500"))
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join("data", "summary_cache.sqlite3"))
+
+SUMMARY_PROMPT = """You are a helpful assistant. Your task is to summarize the following job interview post content in a concise manner.
+Provide a summary that captures the key points and insights.
+
+Content: {content}
+"""
+
+MERGE_PROMPT = """You are a helpful assistant. The notes below are summaries of consecutive parts of one job interview post.
+Merge them into a single concise summary that captures the key points and insights, without repeating yourself.
+
+Notes:
+{content}
+"""
+
+
+def _strip_think(text: str) -> str:
+    return re.sub(r"<think>.*?</think>", "", text or "", flags=re.IGNORECASE | re.DOTALL).strip()
+
+
+def _cache_key(content: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\x00{content}".encode("utf-8")).hexdigest()
+
+
+class Summarizer:
+    """
+    Summarizes interview posts with Ollama, many at a time.
+
+    - at most `concurrency` chat calls run at once; the others wait in line
+      (`queue_depth` in stats)
+    - posts over `chunk_tokens` are split with get_chunks, each part is
+      summarized, and the partial summaries are merged, in rounds if they do
+      not fit one merge prompt
+    - summaries are cached on disk by (content hash, model), so unchanged
+      posts are never summarized twice
+    """
+
+    def __init__(self, model: str = SUMMARY_MODEL, concurrency: int = SUMMARY_CONCURRENCY,
+                 chunk_tokens: int = SUMMARY_CHUNK_TOKENS, cache_path: str = SUMMARY_CACHE_PATH):
+        self.model = model
+        self.concurrency = concurrency
+        self.chunk_tokens = chunk_tokens
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    key TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.llm_calls = 0
+        self.map_reduced = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+        self.eval_tokens = 0
+        self.eval_seconds = 0.0
+
+    # ---------- cache ----------
+
+    def _cached(self, key: str) -> Optional[str]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _store(self, key: str, summary: str) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at) VALUES (?, ?, ?)",
+                (key, summary, time.time())
+            )
+            self._db.commit()
+
+    # ---------- LLM calls ----------
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # A semaphore is bound to the loop it was first used on
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.concurrency)
+            self._sem_loop = loop
+        return self._sem
+
+    async def _chat(self, prompt: str) -> str:
+        from app.llm.llm_functions import get_ollama_client
+
+        loop = asyncio.get_running_loop()
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        waiting = True
+        try:
+            async with self._semaphore():
+                self.queue_depth -= 1
+                waiting = False
+                self.in_flight += 1
+                try:
+                    response = await loop.run_in_executor(
+                        None,
+                        lambda: get_ollama_client().chat(
+                            model=self.model,
+                            messages=[{"role": "user", "content": prompt}]
+                        )
+                    )
+                finally:
+                    self.in_flight -= 1
+        finally:
+            if waiting:  # cancelled before getting a slot
+                self.queue_depth -= 1
+        self.llm_calls += 1
+        # eval_duration is reported in nanoseconds
+        self.eval_tokens += response.get("eval_count") or 0
+        self.eval_seconds += (response.get("eval_duration") or 0) / 1e9
+        return _strip_think(response["message"]["content"])
+
+    async def _split(self, content: str) -> List[str]:
+        from app.llm import get_chunks
+
+        # Every token covers at least one character, so short posts skip the tokenizer
+        if len(content) <= self.chunk_tokens:
+            return [content]
+        loop = asyncio.get_running_loop()
+        # Tokenizing is CPU-bound; keep it off the event loop
+        chunks = await loop.run_in_executor(
+            None, get_chunks.chunk_text_by_tokens, content, self.chunk_tokens
+        )
+        return chunks or [content]
+
+    async def _token_counts(self, texts: List[str]) -> List[int]:
+        from app.llm import get_chunks
+
+        # Every token covers at least one character, so short texts skip the tokenizer
+        if sum(len(t) for t in texts) <= self.chunk_tokens:
+            return [len(t) for t in texts]
+        loop = asyncio.get_running_loop()
+        encoded = await loop.run_in_executor(
+            None, lambda: get_chunks.get_tokenizer()(texts, add_special_tokens=False)["input_ids"]
+        )
+        return [len(ids) for ids in encoded]
+
+    async def _merge(self, group: List[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+        notes = "\n\n".join(f"Part {i}: {s}" for i, s in enumerate(group, 1))
+        return await self._chat(MERGE_PROMPT.format(content=notes))
+
+    async def _reduce(self, partials: List[str]) -> str:
+        """
+        Merge partial summaries into one. Consecutive partials are grouped so each
+        merge prompt stays within `chunk_tokens`, and merged groups are merged
+        again until a single summary is left.
+        """
+        while len(partials) > 1:
+            counts = await self._token_counts(partials)
+            groups: List[List[str]] = [[]]
+            size = 0
+            for partial, count in zip(partials, counts):
+                # Two per group at least, so every round makes progress
+                if len(groups[-1]) >= 2 and size + count > self.chunk_tokens:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(partial)
+                size += count
+            merged = await asyncio.gather(*(self._merge(group) for group in groups))
+            partials = [m for m in merged if m]
+        return partials[0] if partials else ""
+
+    async def summarize(self, content: str) -> str:
+        content = (content or "").strip()
+        if not content:
+            return ""
+        key = _cache_key(content, self.model)
+        summary = self._cached(key)
+        if summary is not None:
+            self.cache_hits += 1
+            return summary
+        self.cache_misses += 1
+
+        parts = await self._split(content)
+        if len(parts) == 1:
+            summary = await self._chat(SUMMARY_PROMPT.format(content=content))
+        else:
+            self.map_reduced += 1
+            partials = await asyncio.gather(*(self._chat(SUMMARY_PROMPT.format(content=p)) for p in parts))
+            summary = await self._reduce([s for s in partials if s])
+
+        self._store(key, summary)
+        return summary
+
+    async def summarize_many(self, contents: List[str]) -> List[str]:
+        """
+        Summaries in the same order as `contents`; a post that fails to
+        summarize yields "" instead of failing the batch.
+        """
+        start = time.perf_counter()
+
+        async def one(content: str) -> str:
+            try:
+                return await self.summarize(content)
+            except Exception as e:
+                print(f"❌ Failed to summarize post: {e!r}")
+                return ""
+
+        summaries = await asyncio.gather(*(one(c) for c in contents))
+        print(f"📝 Summarized {len(contents)} posts in {time.perf_counter() - start:.1f}s: {self.stats()}")
+        return list(summaries)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "llm_calls": self.llm_calls,
+            "map_reduced": self.map_reduced,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "tokens_per_sec": round(self.eval_tokens / self.eval_seconds, 1) if self.eval_seconds else 0.0,
+        }
+
+
+_default_summarizer: Optional[Summarizer] = None
+
+
+def get_summarizer() -> Summarizer:
+    global _default_summarizer
+    if _default_summarizer is None:
+        _default_summarizer = Summarizer()
+    return _default_summarizer
@@ -1,11 +1,49 @@
 import asyncio
+from app.db_functions.schema import ensure_schema
 from app.scraper_runner import ScraperRunner
+from app.scrapers.browser_pool import shutdown_browser_pool
+from app.scrapers.http_session import close_http_session
+
+
+async def ingest_companies(companies: list[str], sources: list[str] = ["gfg", "leetcode"]):
+    # All companies share one warm Chromium and HTTP session; both are shut down once at the end.
+    results = {}
+    # Inserts need the per-chunk columns; fail before scraping rather than on every flush
+    await asyncio.get_running_loop().run_in_executor(None, ensure_schema)
+    try:
+        for company in companies:
+            runner = ScraperRunner(company, sources)
+            results[company] = await runner.process()
+    finally:
+        await shutdown_browser_pool()
+        await close_http_session()
+    return results
+
+
+def format_ingest_summary(company: str, summary: dict) -> str:
+    lines = [f"{company}:"]
+    for source, r in summary.items():
+        line = f"  {source}: {r['status']} — {r['posts']} posts, {r['chunks']} chunks in {r['seconds']:.1f}s"
+        lines.append(line + (f" ({r['error']})" if r.get("error") else ""))
+    return "\n".join(lines)
+
+
+async def scrape_and_add_company_async(name: str) -> str:
+    results = await ingest_companies([name])
+    return format_ingest_summary(name, results[name])
+
+
+def scrape_and_add_company(name: str) -> str:
+    """
+    Scrape and ingest one company; returns a per-source summary for display.
+    """
+    return asyncio.run(scrape_and_add_company_async(name))
+
 
 def main():
     company = "Atlassian"
     print(f"🌐 Scraping data for {company}...")
-    runner = ScraperRunner(company, ["gfg","leetcode"])
-    asyncio.run(runner.process())
+    asyncio.run(ingest_companies([company]))
     print(f"✅ Finished scraping and storing data for {company}.")
 
 if __name__ == "__main__":
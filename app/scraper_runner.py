@@ -1,28 +1,203 @@
 # app/scraper_runner.py
 import asyncio
+import time
 from app.factory.scraper_factory import get_scraper
 from app.db_functions.company_crud import add_company
-from app.db_functions.add_embeddings import insert_post_async
-from app.llm.llm_functions import create_embeddings
+from app.db_functions.add_embeddings import BulkInserter, get_chunk_hashes, delete_chunks_from
+from app.llm.llm_functions import create_embeddings_batch
 from app.llm import get_chunks
+from app.llm.summarizer import get_summarizer
 from app import cache_local
+from app.answer_cache import invalidate_company
+
+_DONE = object()  # end-of-stream marker passed between pipeline stages
+
+DEFAULT_WORKERS = {"chunk": 1, "embed": 2, "insert": 1}
+CACHE_WRITE_BATCH = 25  # scraped posts per SQLite transaction
+
+
+def _drain(queue: asyncio.Queue, first, limit: int) -> tuple[list, bool]:
+    """
+    Collect `first` plus whatever is already queued, up to `limit` items.
+    Returns (items, saw_done). Plain function: it only uses get_nowait(), so
+    it never yields to the loop and a batch is taken atomically.
+    """
+    items = [first]
+    while len(items) < limit:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if item is _DONE:
+            return items, True
+        items.append(item)
+    return items, False
 
 
 class ScraperRunner:
-    def __init__(self, company: str, sources: list[str] = ["gfg"]):
+    """
+    Ingests a company as a streaming pipeline of bounded queues:
+
+        scrape → chunk → embed → insert
+
+    Each stage runs `workers[stage]` workers. Full queues block the stage
+    upstream (backpressure), so rows reach Postgres while scraping is still
+    running and end-to-end time tracks the slowest stage.
+
+    Sources run concurrently, each with its own pipeline. A source that raises
+    or exceeds `source_timeout` is reported in the summary without cancelling
+    the others.
+
+    With `incremental=True` links are re-listed, but only links that are new
+    (or last scraped more than `rescrape_after` seconds ago) are scraped, and
+    posts whose content hash is unchanged stop there. In every mode chunks are
+    stored per (link, chunk_index) and only chunks whose text hash differs from
+    the stored one are re-embedded. With `summarize=True` each post is replaced
+    by its (cached) LLM summary before chunking.
+    """
+
+    def __init__(
+        self,
+        company: str,
+        sources: list[str] = ["gfg"],
+        embed_batch_size: int = 32,
+        embed_max_in_flight: int = 4,
+        insert_flush_size: int = 500,
+        insert_flush_interval: float = 2.0,
+        workers: dict[str, int] | None = None,
+        queue_size: int = 64,
+        chunk_batch_size: int = 16,
+        source_concurrency: dict[str, int] | None = None,
+        source_timeout: float | None = None,
+        incremental: bool = False,
+        rescrape_after: float | None = None,
+        summarize: bool = False,
+    ):
         self.company = company
         self.sources = sources
+        self.embed_batch_size = embed_batch_size
+        self.embed_max_in_flight = embed_max_in_flight
+        self.insert_flush_size = insert_flush_size
+        self.insert_flush_interval = insert_flush_interval
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self.queue_size = queue_size
+        self.chunk_batch_size = chunk_batch_size
+        # Max pages scraped at once per source, e.g. {"gfg": 8, "leetcode": 3}
+        self.source_concurrency = source_concurrency or {}
+        self.source_timeout = source_timeout
+        self.incremental = incremental
+        self.rescrape_after = rescrape_after
+        # Store LLM summaries instead of raw post text (cached per content hash)
+        self.summarize = summarize
+        # source -> (cache_key, link index, scraped posts, links that failed downstream,
+        #            links handed to the inserter)
+        self._link_state: dict[str, tuple] = {}
 
     async def process(self):
-        for source in self.sources:
-            scraper = get_scraper(source)
-            if not scraper:
-                print(f"❌ No scraper found for {source}")
-                continue
+        inserter = BulkInserter(
+            flush_size=self.insert_flush_size,
+            flush_interval=self.insert_flush_interval,
+        )
+        try:
+            results = await asyncio.gather(
+                *(self._run_source(source, inserter) for source in self.sources)
+            )
+        finally:
+            await inserter.close_async()
 
-            print(f"🔍 Using {source} scraper for {self.company}")
-            source_short = "gfg" if source == "gfg" else "lc"
-            cache_key = f"{self.company}_{source_short}"
+        summary = dict(zip(self.sources, results))
+        # A failed flush only loses rows; it must still fail the source
+        for source, (*_, sent_links) in self._link_state.items():
+            lost = sent_links & inserter.failed_links
+            if lost and summary[source]["status"] == "ok":
+                summary[source]["status"] = "failed"
+                summary[source]["error"] = f"rows for {len(lost)} links failed to insert"
+        self._save_link_indexes(inserter.failed_links)
+
+        if any(r["status"] == "ok" for r in results):
+            add_company(self.company.lower())
+            invalidate_company(self.company)
+        for source, r in summary.items():
+            print(f"📋 {source}: {r['status']} — {r['posts']} posts, {r['chunks']} chunks "
+                  f"in {r['seconds']:.1f}s" + (f" ({r['error']})" if r.get("error") else ""))
+        return summary
+
+    def _save_link_indexes(self, failed_inserts: set) -> None:
+        """
+        Record content hashes only for posts whose chunks were all embedded and
+        written, so a post that failed downstream is picked up again by the
+        next incremental run.
+        """
+        for cache_key, index, posts, failed, _ in self._link_state.values():
+            for post in posts:
+                if post["link"] not in failed and post["link"] not in failed_inserts:
+                    cache_local.record_scraped_post(index, post)
+            cache_local.save_link_index(cache_key, index)
+        self._link_state.clear()
+
+    async def _run_source(self, source: str, inserter: BulkInserter) -> dict:
+        """
+        Runs one source's pipeline and never raises: failures and timeouts are
+        recorded in the returned summary so sibling sources keep going.
+        """
+        stats = {"status": "ok", "posts": 0, "chunks": 0, "unchanged_chunks": 0, "rows": 0, "seconds": 0.0}
+        start = time.perf_counter()
+        deadline = asyncio.timeout(self.source_timeout)
+        try:
+            async with deadline:
+                await self._process_source(source, inserter, stats)
+        except TimeoutError as e:
+            # Timeouts raised inside the pipeline (aiohttp, Playwright) are plain failures
+            if self.source_timeout is not None and deadline.expired():
+                stats["status"] = "timeout"
+                stats["error"] = f"timed out after {self.source_timeout}s"
+            else:
+                stats["status"] = "failed"
+                stats["error"] = repr(e)
+            print(f"❌ {source} failed for {self.company}: {stats['error']}")
+        except Exception as e:
+            stats["status"] = "failed"
+            stats["error"] = repr(e)
+            print(f"❌ {source} failed for {self.company}: {e!r}")
+        stats["seconds"] = round(time.perf_counter() - start, 2)
+        return stats
+
+    async def _process_source(self, source: str, inserter: BulkInserter, stats: dict) -> None:
+        scraper = get_scraper(source)
+        if not scraper:
+            raise ValueError(f"No scraper found for {source}")
+
+        print(f"🔍 Using {source} scraper for {self.company}")
+        source_short = "gfg" if source == "gfg" else "lc"
+        cache_key = f"{self.company}_{source_short}"
+        concurrency_limit = self.source_concurrency.get(source, 5)
+
+        chunk_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        embed_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size * self.embed_batch_size)
+        insert_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        scraped_posts: list[dict] = []  # hashes recorded once ingested, see _save_link_indexes
+        failed_links: set[str] = set()
+        sent_links: set[str] = set()
+        index = cache_local.load_link_index(cache_key)
+        loop = asyncio.get_running_loop()
+        pending_cache: list[dict] = []
+
+        async def cache_post(post: dict):
+            # SQLite commits block; batch them and keep them off the event loop
+            pending_cache.append(post)
+            if len(pending_cache) >= CACHE_WRITE_BATCH:
+                await flush_cached_posts()
+
+        async def flush_cached_posts():
+            batch = pending_cache[:]
+            pending_cache.clear()
+            if batch:
+                await loop.run_in_executor(None, cache_local.append_scraped_posts, cache_key, batch)
+
+        async def scrape_stage():
+            if self.incremental:
+                await incremental_scrape_stage()
+                return
 
             links = cache_local.load_links_from_cache(cache_key)
             if not links:
@@ -31,21 +206,158 @@ class ScraperRunner:
             else:
                 print(f"📦 Loaded cached links for {self.company} from {source}")
 
-            posts = cache_local.load_scraped_data_from_cache(cache_key)
-            if not posts:
-                posts = await scraper.scrape_multiple_posts(links)
-                cache_local.save_scraped_data_to_cache(cache_key, posts)
-            else:
+            cached = 0
+            for post in cache_local.iter_scraped_data_from_cache(cache_key):
+                cached += 1
+                if post.get("content"):
+                    await chunk_q.put(post)
+            if cached:
                 print(f"📦 Loaded cached posts for {self.company} from {source}")
+                stats["posts"] = cached
+            else:
+                # Leftovers of an unfinished snapshot must not mix with the new one
+                await loop.run_in_executor(None, cache_local.clear_scraped_posts, cache_key)
 
-            print(f"🔗 Found {len(posts)} posts for {self.company} from {source}")
+                async def on_post(post: dict):
+                    await cache_post(post)
+                    scraped_posts.append(post)
+                    await chunk_q.put(post)
 
-            for post in posts:
-                if post.get("content"):
-                    chunks = get_chunks.chunk_text_by_tokens(post["content"])
-                    for chunk in chunks:
-                        embeddings = await create_embeddings(chunk)
-                        if embeddings:
-                            await insert_post_async(post["link"], chunk, embeddings)
+                posts = await scraper.scrape_multiple_posts(
+                    links, concurrency_limit=concurrency_limit, on_post=on_post
+                )
+                await flush_cached_posts()
+                await loop.run_in_executor(None, cache_local.mark_scraped_data_complete, cache_key)
+                stats["posts"] = len(posts)
+                # Hashes let a later incremental run skip these posts
+                cache_local.mark_links_seen(index, links)
+
+            print(f"🔗 Found {stats['posts']} posts for {self.company} from {source}")
+
+        async def incremental_scrape_stage():
+            links = await scraper.get_links(self.company)
+            if links:
+                cache_local.save_links_to_cache(cache_key, links)
+            else:
+                links = cache_local.load_links_from_cache(cache_key) or []
+
+            now = time.time()
+
+            def needs_scrape(link: dict) -> bool:
+                entry = index.get(link["link"])
+                if not entry or "content_hash" not in entry:
+                    return True
+                return self.rescrape_after is not None and now - entry.get("scraped_at", 0) >= self.rescrape_after
+
+            to_scrape = [link for link in links if needs_scrape(link)]
+            cache_local.mark_links_seen(index, links, now)
+            print(f"♻️ {source}: {len(to_scrape)} of {len(links)} links are new or due for a re-scrape")
+
+            async def on_post(post: dict):
+                await cache_post(post)
+                scraped_posts.append(post)
+                if cache_local.post_changed(index, post):
+                    await chunk_q.put(post)
+                else:
+                    stats["unchanged_posts"] = stats.get("unchanged_posts", 0) + 1
+
+            scraped = []
+            if to_scrape:
+                scraped = await scraper.scrape_multiple_posts(
+                    to_scrape, concurrency_limit=concurrency_limit, on_post=on_post
+                )
+            await flush_cached_posts()
+            await loop.run_in_executor(None, cache_local.mark_scraped_data_complete, cache_key)
+
+            stats["posts"] = len(scraped)
+            print(f"🔗 Scraped {len(scraped)} new or changed posts for {self.company} from {source}")
+
+        async def chunk_worker():
+            done = False
+            while not done:
+                item = await chunk_q.get()
+                if item is _DONE:
+                    break
+                posts, done = _drain(chunk_q, item, self.chunk_batch_size)
+                try:
+                    texts = [p["content"] for p in posts]
+                    if self.summarize:
+                        summaries = await get_summarizer().summarize_many(texts)
+                        texts = [summary or text for summary, text in zip(summaries, texts)]
+                    # Tokenizing is CPU-bound; keep it off the event loop
+                    chunks_per_post = await loop.run_in_executor(
+                        None, get_chunks.chunk_texts_by_tokens, texts
+                    )
+                    stored = await loop.run_in_executor(None, get_chunk_hashes, [p["link"] for p in posts])
+                except Exception as e:
+                    print(f"❌ Failed to chunk {len(posts)} posts: {e}")
+                    failed_links.update(p["link"] for p in posts)
+                    continue
+                for post, chunks in zip(posts, chunks_per_post):
+                    link = post["link"]
+                    stored_hashes = stored.get(link, {})
+                    if any(index >= len(chunks) for index in stored_hashes):
+                        await loop.run_in_executor(None, delete_chunks_from, link, len(chunks))
+                    for index, chunk in enumerate(chunks):
+                        chunk_hash = cache_local.content_hash(chunk)
+                        if stored_hashes.get(index) == chunk_hash:
+                            stats["unchanged_chunks"] += 1
+                            continue
+                        stats["chunks"] += 1
+                        await embed_q.put((link, index, chunk_hash, chunk))
+
+        async def embed_worker():
+            done = False
+            while not done:
+                item = await embed_q.get()
+                if item is _DONE:
+                    break
+                rows, done = _drain(embed_q, item, self.embed_batch_size)
+                try:
+                    embeddings = await create_embeddings_batch(
+                        [chunk for *_, chunk in rows],
+                        batch_size=self.embed_batch_size,
+                        max_in_flight=self.embed_max_in_flight,
+                    )
+                except Exception as e:
+                    print(f"❌ Failed to embed {len(rows)} chunks: {e}")
+                    failed_links.update(link for link, *_ in rows)
+                    continue
+                failed_links.update(link for (link, *_), embedding in zip(rows, embeddings) if not embedding)
+                await insert_q.put([
+                    (link, index, chunk_hash, chunk, embedding)
+                    for (link, index, chunk_hash, chunk), embedding in zip(rows, embeddings)
+                    if embedding
+                ])
+
+        async def insert_worker():
+            while True:
+                rows = await insert_q.get()
+                if rows is _DONE:
+                    break
+                sent_links.update(row[0] for row in rows)
+                await inserter.add_many_async(rows)
+                stats["rows"] += len(rows)
+
+        async def run_stage(n_workers, worker, next_q=None, next_workers=0):
+            await asyncio.gather(*(worker() for _ in range(n_workers)))
+            for _ in range(next_workers):
+                await next_q.put(_DONE)
+
+        # A worker that sees _DONE while draining stops without re-queueing it,
+        # so every worker of a stage gets its own marker.
+        async def scrape_then_close():
+            await scrape_stage()
+            for _ in range(self.workers["chunk"]):
+                await chunk_q.put(_DONE)
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(scrape_then_close())
+            tg.create_task(run_stage(self.workers["chunk"], chunk_worker, embed_q, self.workers["embed"]))
+            tg.create_task(run_stage(self.workers["embed"], embed_worker, insert_q, self.workers["insert"]))
+            tg.create_task(run_stage(self.workers["insert"], insert_worker))
+
+        self._link_state[source] = (cache_key, index, scraped_posts, failed_links, sent_links)
 
-        add_company(self.company.lower())
+        print(f"✅ {source}: {stats['posts']} posts → {stats['chunks']} changed chunks "
+              f"({stats['unchanged_chunks']} unchanged) → {stats['rows']} rows queued for insert")
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app import cache_local, scraper_runner
+from app.llm import get_chunks
+from app.scraper_runner import _DONE, ScraperRunner, _drain
+
+
+class StubScraper:
+    def __init__(self, n_posts):
+        self.links = [{"title": f"post {i}", "link": f"https://x/{i}"} for i in range(n_posts)]
+
+    async def get_links(self, company):
+        return self.links
+
+    async def scrape_multiple_posts(self, links, concurrency_limit=5, on_post=None):
+        posts = []
+        for link in links:
+            post = {"link": link["link"], "title": link["title"], "content": f"{link['link']} a. b. c."}
+            posts.append(post)
+            if on_post:
+                await on_post(post)
+            await asyncio.sleep(0)
+        return posts
+
+
+class StubInserter:
+    fail = False  # set by a test to make every flush fail
+    last = None  # the inserter of the latest run, once closed
+
+    def __init__(self, **kwargs):
+        self.rows = []
+        self.failed_links = set()
+
+    async def add_many_async(self, rows):
+        if StubInserter.fail:
+            self.failed_links.update(row[0] for row in rows)
+        else:
+            self.rows.extend(rows)
+
+    async def close_async(self):
+        StubInserter.last = self
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_local, "CACHE_DB_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(cache_local, "migrate_json_cache", lambda root=None: 0)
+    monkeypatch.setattr(cache_local, "_conn", None)
+
+    async def embed(texts, batch_size, max_in_flight):
+        await asyncio.sleep(0)
+        return [[1.0, 0.0] for _ in texts]
+
+    # One chunk per sentence
+    monkeypatch.setattr(get_chunks, "chunk_texts_by_tokens",
+                        lambda texts: [[s.strip() for s in t.split(".") if s.strip()] for t in texts])
+    monkeypatch.setattr(scraper_runner, "create_embeddings_batch", embed)
+    monkeypatch.setattr(scraper_runner, "BulkInserter", StubInserter)
+    monkeypatch.setattr(scraper_runner, "get_chunk_hashes", lambda links: {})
+    monkeypatch.setattr(scraper_runner, "delete_chunks_from", lambda link, n: 0)
+    monkeypatch.setattr(scraper_runner, "add_company", lambda name: None)
+    monkeypatch.setattr(scraper_runner, "invalidate_company", lambda name: None)
+    monkeypatch.setattr(StubInserter, "fail", False)
+    yield monkeypatch
+    if cache_local._conn is not None:
+        cache_local._conn.close()
+
+
+def _run(runner, timeout=5):
+    # A stage that never sees _DONE hangs the pipeline; fail instead of waiting forever
+    return asyncio.run(asyncio.wait_for(runner.process(), timeout))
+
+
+def test_drain_stops_at_done_and_limit():
+    queue = asyncio.Queue()
+    for item in (2, 3, _DONE, 4):
+        queue.put_nowait(item)
+    assert _drain(queue, 1, limit=10) == ([1, 2, 3], True)
+    assert queue.get_nowait() == 4
+
+    for item in (5, 6, 7):
+        queue.put_nowait(item)
+    assert _drain(queue, 4, limit=2) == ([4, 5], False)
+
+
+@pytest.mark.parametrize("workers", [
+    {"chunk": 1, "embed": 1, "insert": 1},
+    {"chunk": 3, "embed": 4, "insert": 2},
+])
+def test_every_stage_shuts_down_after_done(pipeline, workers):
+    pipeline.setattr(scraper_runner, "get_scraper", lambda source: StubScraper(30))
+    runner = ScraperRunner("acme", ["gfg"], workers=workers, queue_size=2,
+                           chunk_batch_size=4, embed_batch_size=3)
+    summary = _run(runner)
+    assert summary["gfg"]["status"] == "ok"
+    assert summary["gfg"]["posts"] == 30
+    # Three sentences, so three chunks, per post
+    assert summary["gfg"]["chunks"] == 90
+    assert len(StubInserter.last.rows) == 90
+
+
+def test_embed_failure_does_not_stall_the_pipeline(pipeline):
+    async def failing_embed(texts, batch_size, max_in_flight):
+        raise RuntimeError("ollama down")
+
+    pipeline.setattr(scraper_runner, "get_scraper", lambda source: StubScraper(5))
+    pipeline.setattr(scraper_runner, "create_embeddings_batch", failing_embed)
+    runner = ScraperRunner("acme", ["gfg"], incremental=True)
+    summary = _run(runner)
+    assert summary["gfg"]["rows"] == 0
+    # Nothing was stored, so nothing may be recorded as ingested
+    assert all("content_hash" not in e for e in cache_local.load_link_index("acme_gfg").values())
+
+
+def test_failed_inserts_fail_the_source(pipeline):
+    pipeline.setattr(scraper_runner, "get_scraper", lambda source: StubScraper(3))
+    pipeline.setattr(StubInserter, "fail", True)
+    summary = _run(ScraperRunner("acme", ["gfg"]))
+    assert summary["gfg"]["status"] == "failed"
+    assert "failed to insert" in summary["gfg"]["error"]
+
+
+def test_failing_source_does_not_cancel_its_sibling(pipeline):
+    def get_scraper(source):
+        return StubScraper(4) if source == "gfg" else None
+
+    pipeline.setattr(scraper_runner, "get_scraper", get_scraper)
+    summary = _run(ScraperRunner("acme", ["gfg", "leetcode"]))
+    assert summary["gfg"]["status"] == "ok"
+    assert summary["leetcode"]["status"] == "failed"
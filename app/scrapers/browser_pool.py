@@ -0,0 +1,259 @@
+# app/scrapers/browser_pool.py
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route
+
+USER_AGENT: str = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+)
+
+# The scrapers only read page.content(); none of these affect the DOM text.
+DEFAULT_BLOCKED_TYPES = frozenset({"image", "media", "font", "stylesheet", "imageset"})
+DEFAULT_BLOCKED_DOMAINS = frozenset({
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com",
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "adservice.google.com", "facebook.net", "connect.facebook.net",
+    "hotjar.com", "scorecardresearch.com", "quantserve.com", "taboola.com",
+    "outbrain.com", "criteo.com", "amazon-adsystem.com", "adnxs.com",
+    "pubmatic.com", "rubiconproject.com", "moatads.com", "clarity.ms",
+    "sentry.io", "segment.io", "mixpanel.com", "onesignal.com",
+})
+
+
+def _domain_matches(host: str, domains: Iterable[str]) -> Optional[str]:
+    for domain in domains:
+        if host == domain or host.endswith("." + domain):
+            return domain
+    return None
+
+
+class ResourcePolicy:
+    """
+    Request-interception rules applied with page.route: drops heavy resource
+    types and ad/analytics domains. `allow_types` exempts resource types from
+    the type rules and `allow_domains` exempts hosts from the domain
+    blocklist; neither lifts the other rule.
+
+    Counters: requests blocked (by type and by domain), requests allowed and
+    the bytes those allowed responses declared. Blocked requests are aborted
+    before any bytes are sent, so their size cannot be measured.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        block_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+        block_domains: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+        allow_types: Iterable[str] = (),
+        allow_domains: Iterable[str] = (),
+    ):
+        self.enabled = enabled
+        self.block_types = frozenset(block_types) - frozenset(allow_types)
+        self.block_domains = frozenset(block_domains)
+        self.allow_domains = frozenset(allow_domains)
+        self.blocked_by_type: Counter = Counter()
+        self.blocked_by_domain: Counter = Counter()
+        self.blocked_requests = 0
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    def block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        host = urlparse(url).hostname or ""
+        # allow_domains only lifts the domain blocklist; type rules still apply
+        domain = _domain_matches(host, self.block_domains)
+        if domain and not _domain_matches(host, self.allow_domains):
+            return f"domain:{domain}"
+        if resource_type in self.block_types:
+            return f"type:{resource_type}"
+        return None
+
+    async def _handle(self, route: Route) -> None:
+        request = route.request
+        reason = self.block_reason(request.resource_type, request.url)
+        if reason is None:
+            self.allowed_requests += 1
+            await route.continue_()
+            return
+        self.blocked_requests += 1
+        self.blocked_by_type[request.resource_type] += 1
+        if reason.startswith("domain:"):
+            self.blocked_by_domain[reason[len("domain:"):]] += 1
+        await route.abort("blockedbyclient")
+
+    def _on_response(self, response) -> None:
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.allowed_bytes += int(length)
+
+    async def attach(self, page: Page) -> None:
+        if not self.enabled:
+            return
+        await page.route("**/*", self._handle)
+        page.on("response", self._on_response)
+
+    def stats(self) -> dict:
+        return {
+            "blocked_requests": self.blocked_requests,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "blocked_by_domain": dict(self.blocked_by_domain),
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes,
+        }
+
+
+class _ContextSlot:
+    def __init__(self, context: BrowserContext):
+        self.context = context
+        self.pages_served = 0
+        self.active = 0
+        self.retired = False
+
+
+class BrowserPool:
+    """
+    Keeps one warm Chromium and hands out pages from shared contexts.
+
+    - at most `max_pages` pages are open at once (callers wait for a slot)
+    - a context is retired after `pages_per_context` pages and closed once its
+      last page is returned, which bounds renderer memory on long ingests
+    - Chromium is launched on first use and stopped by close()
+    """
+
+    def __init__(self, headless: bool = True, max_pages: int = 8,
+                 pages_per_context: int = 50, user_agent: str = USER_AGENT,
+                 resource_policy: Optional[ResourcePolicy] = None):
+        self.headless = headless
+        # Used for pages borrowed without their own policy
+        self.resource_policy = resource_policy or ResourcePolicy()
+        self.max_pages = max_pages
+        self.pages_per_context = pages_per_context
+        self.user_agent = user_agent
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._current: Optional[_ContextSlot] = None
+        self._slots: List[_ContextSlot] = []
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.browser_launches = 0
+        self.contexts_created = 0
+        self.pages_served = 0
+
+    async def start(self) -> None:
+        if self._browser is not None:
+            return
+        if self._lock is None:
+            self.loop = asyncio.get_running_loop()
+            self._lock = asyncio.Lock()
+            self._sem = asyncio.Semaphore(self.max_pages)
+        async with self._lock:
+            if self._browser is not None:
+                return
+            print("🚀 Launching shared Chromium")
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self.browser_launches += 1
+
+    async def _new_context(self) -> BrowserContext:
+        return await self._browser.new_context(user_agent=self.user_agent)
+
+    async def _acquire_slot(self) -> _ContextSlot:
+        async with self._lock:
+            if self._current is None or self._current.retired:
+                self._current = _ContextSlot(await self._new_context())
+                self._slots.append(self._current)
+                self.contexts_created += 1
+            slot = self._current
+            slot.active += 1
+            slot.pages_served += 1
+            if slot.pages_served >= self.pages_per_context:
+                slot.retired = True
+            return slot
+
+    async def _release_slot(self, slot: _ContextSlot) -> None:
+        slot.active -= 1
+        if slot.retired and slot.active == 0:
+            self._slots.remove(slot)
+            try:
+                await slot.context.close()
+            except Exception as e:
+                print(f"⚠️ Error closing retired context: {e}")
+
+    @asynccontextmanager
+    async def page(self, policy: Optional[ResourcePolicy] = None) -> AsyncIterator[Page]:
+        """
+        Borrow a page: `async with pool.page() as page: ...`
+        `policy` overrides the pool's resource-blocking policy for this page.
+        """
+        await self.start()
+        async with self._sem:
+            slot = await self._acquire_slot()
+            page: Optional[Page] = None
+            try:
+                page = await slot.context.new_page()
+                await (policy or self.resource_policy).attach(page)
+                self.pages_served += 1
+                yield page
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                await self._release_slot(slot)
+
+    def stats(self) -> dict:
+        return {
+            "browser_launches": self.browser_launches,
+            "contexts_created": self.contexts_created,
+            "open_contexts": len(self._slots),
+            "pages_served": self.pages_served,
+        }
+
+    async def close(self) -> None:
+        for slot in list(self._slots):
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        self._slots.clear()
+        self._current = None
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        print(f"🛑 Browser pool closed: {self.stats()}")
+
+
+_shared_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Process-wide pool shared by all scrapers. A pool bound to an event loop that
+    has since closed cannot be reused, so a fresh one is created in that case.
+    Whoever owns the loop is expected to await shutdown_browser_pool() on it.
+    """
+    global _shared_pool
+    if _shared_pool is not None and _shared_pool.loop is not None and _shared_pool.loop.is_closed():
+        # Too late to stop its browser: close() must run on the owning loop
+        # (shutdown_browser_pool in ingest_companies, the API lifespan, BackgroundLoop.close)
+        print("⚠️ Browser pool outlived its event loop without shutdown_browser_pool(); starting a new one")
+        _shared_pool = None
+    if _shared_pool is None:
+        _shared_pool = BrowserPool()
+    return _shared_pool
+
+
+async def shutdown_browser_pool() -> None:
+    global _shared_pool
+    if _shared_pool is not None:
+        pool, _shared_pool = _shared_pool, None
+        await pool.close()
@@ -1,61 +1,154 @@
 import asyncio
-from typing import List, Dict, Any
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
-from bs4 import BeautifulSoup
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from bs4 import SoupStrainer
 
 from app.interfaces.scraper_interface import ScraperInterface
+from app.scrapers.browser_pool import BrowserPool, ResourcePolicy, get_browser_pool
+from app.scrapers.http_session import fetch, fetch_html, parse_html
+
+ARTICLE_CONTAINER: str = "div.TagCategoryArticle_articleContainer__yJdy6"
+CONTENT_SELECTOR: str = "div.text"
+# Only the div elements are needed to find the selectors above
+_DIVS_ONLY = SoupStrainer("div")
+
+
+def _parse_tag_page(html: str) -> List[Dict[str, str]]:
+    links: List[Dict[str, str]] = []
+    soup = parse_html(html, _DIVS_ONLY)
+    for article in soup.select(ARTICLE_CONTAINER):
+        try:
+            a_tag = article.select_one("a")
+            if a_tag:
+                links.append({"title": a_tag.get_text(strip=True), "link": a_tag["href"]})
+        except Exception as e:
+            print(f"❌ Error parsing article: {e}")
+    return links
+
+
+def _parse_post(html: str) -> str:
+    soup = parse_html(html, _DIVS_ONLY)
+    content_div = soup.select_one(CONTENT_SELECTOR)
+    return content_div.get_text(separator="\n", strip=True) if content_div else ""
 
-HEADLESS: bool = True  # Set this as needed
 
 class GfgScraper(ScraperInterface):
-    async def get_links(self, company_name: str) -> List[Dict[str, str]]:
+    """
+    GFG tag and article pages are server-rendered, so by default
+    (`fetch_mode="http"`) they are fetched over a pooled aiohttp session and
+    Playwright is only used for pages where that fast path finds no content.
+    `fetch_mode="browser"` always renders in Chromium.
+    """
+
+    def __init__(
+        self,
+        browser_pool: Optional[BrowserPool] = None,
+        fetch_mode: str = "http",
+        http_concurrency_limit: int = 32,
+        resource_policy: Optional[ResourcePolicy] = None,
+    ):
+        self.browser_pool: BrowserPool = browser_pool or get_browser_pool()
+        # Article text is in the server-rendered HTML; block everything heavy
+        self.resource_policy: ResourcePolicy = resource_policy or ResourcePolicy()
+        self.fetch_mode = fetch_mode
+        self.http_concurrency_limit = http_concurrency_limit
+
+    async def _fetch_tag_page(self, url: str, page_number: int, max_retries: int = 3) -> Optional[List[Dict[str, str]]]:
+        """
+        Links on one tag page. An empty list means the page returned 404 or
+        had no articles once rendered, i.e. pagination has ended; None means
+        the page could not be fetched.
+        """
+        if self.fetch_mode == "http":
+            status, html = await fetch(url)
+            if status == 404:
+                return []
+            page_links = _parse_tag_page(html) if html else []
+            if page_links:
+                print(f"⚡ Collected {len(page_links)} links over HTTP from page {page_number}")
+                return page_links
+            # Network error, unexpected status, or no article container (bot check,
+            # layout change, client-side rendering): let the browser decide
+
+        for attempt in range(1, max_retries + 1):
+            try:
+                async with self.browser_pool.page(self.resource_policy) as page:
+                    response = await page.goto(url, wait_until="domcontentloaded")
+                    if response is not None and response.status == 404:
+                        return []
+                    print(f"🔗 Successfully loaded page {page_number}")
+                    try:
+                        await page.wait_for_selector(ARTICLE_CONTAINER, state="attached", timeout=5000)
+                    except PlaywrightTimeoutError:
+                        pass  # no articles: past the last page
+                    html: str = await page.content()
+                print("✅ Page content collected")
+                return _parse_tag_page(html)
+            except Exception as e:
+                print(f"❌ Failed to load or process page {url} (attempt {attempt}): {e}")
+                if attempt == max_retries:
+                    print(f"❌ Giving up on {url} after {max_retries} attempts.")
+                else:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))  # Back off before retrying
+        return None
+
+    async def get_links(
+        self,
+        company_name: str,
+        max_pages: int = 20,
+        window: int = 4
+    ) -> List[Dict[str, str]]:
+        """
+        Fetch tag pages `window` at a time and stop scheduling new pages as soon
+        as one comes back without articles (or 404). Pages that fail to load are
+        skipped without ending pagination. Links are de-duplicated as pages arrive.
+        """
         company_name = company_name.lower().replace(" ", "-")
         print(f"🌐 Collecting gfg links for company: {company_name}")
         links: List[Dict[str, str]] = []
+        seen: set[str] = set()
+        last_page: int = max_pages  # lowers to the first empty page once found
+        next_page: int = 1
+        pending: Dict[asyncio.Task, int] = {}
+
         try:
-            async with async_playwright() as p:
-                try:
-                    browser: Browser = await p.chromium.launch(headless=HEADLESS)
-                    page: Page = await browser.new_page(user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-                    ))
-                    for page_number in range(1, 6):
-                        url: str = f"https://www.geeksforgeeks.org/tag/{company_name}/page/{page_number}/?type=recent"
-                        print(f"🔗 Visiting: {url}")
-                        max_retries: int = 3
-                        for attempt in range(1, max_retries + 1):
-                            try:
-                                await page.goto(url, wait_until="domcontentloaded")
-                                print(f"🔗 Successfully loaded page {page_number}")
-                                await page.wait_for_timeout(2000)
-                                html: str = await page.content()
-                                print("✅ Page content collected")
-                                soup = BeautifulSoup(html, 'html.parser')
-                                articles = soup.select("div.TagCategoryArticle_articleContainer__yJdy6")
-                                for article in articles:
-                                    try:
-                                        a_tag = article.select_one("a")
-                                        if a_tag:
-                                            title: str = a_tag.get_text(strip=True)
-                                            link: str = a_tag["href"]
-                                            links.append({"title": title, "link": link})
-                                    except Exception as e:
-                                        print(f"❌ Error parsing article: {e}")
-                                break  # Success, exit retry loop
-                            except Exception as e:
-                                print(f"❌ Failed to load or process page {url} (attempt {attempt}): {e}")
-                                if attempt == max_retries:
-                                    print(f"❌ Giving up on {url} after {max_retries} attempts.")
-                                else:
-                                    await asyncio.sleep(2)  # Wait before retrying
-                    await browser.close()
-                except Exception as e:
-                    print(f"❌ Error launching browser or creating page: {e}")
-                    return []
+            while pending or next_page <= last_page:
+                while len(pending) < window and next_page <= last_page:
+                    url: str = f"https://www.geeksforgeeks.org/tag/{company_name}/page/{next_page}/?type=recent"
+                    print(f"🔗 Visiting: {url}")
+                    pending[asyncio.create_task(self._fetch_tag_page(url, next_page))] = next_page
+                    next_page += 1
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page_number = pending.pop(task)
+                    page_links = task.result()
+                    if page_links is None:
+                        # A failed fetch is not the end of pagination; skip the page
+                        print(f"⚠️ Page {page_number} could not be fetched, continuing")
+                        continue
+                    if not page_links:
+                        if page_number <= last_page:
+                            print(f"🛑 Page {page_number} has no articles, stopping pagination")
+                        last_page = min(last_page, page_number - 1)
+                        continue
+                    for link in page_links:
+                        if link["link"] not in seen:
+                            seen.add(link["link"])
+                            links.append(link)
+
+                # Pages past the first empty one are not needed
+                for task, page_number in list(pending.items()):
+                    if page_number > last_page:
+                        task.cancel()
+                        pending.pop(task)
         except Exception as e:
-            print(f"❌ Error initializing Playwright: {e}")
-            return []
+            print(f"❌ Error while collecting links: {e}")
+            for task in pending:
+                task.cancel()
+            return links
+
+        print(f"✅ Collected {len(links)} unique gfg links")
         return links
 
     async def scrape_single_post(
@@ -74,10 +167,7 @@ class GfgScraper(ScraperInterface):
                 await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
                 await page.wait_for_timeout(1500)
                 html: str = await page.content()
-
-                soup = BeautifulSoup(html, "html.parser")
-                content_div = soup.select_one("div.text")
-                content: str = content_div.get_text(separator="\n", strip=True) if content_div else ""
+                content: str = _parse_post(html)
 
                 if not content:
                     print(f"⚠️ Content div not found for: {url}")
@@ -98,28 +188,47 @@ class GfgScraper(ScraperInterface):
                         "content": ""
                     }
 
+    async def scrape_single_post_http(self, link_obj: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Fast path: one HTTP round trip, no rendering. Returns None when the
+        content container is missing so the caller can fall back to Playwright.
+        """
+        url: str = link_obj["link"]
+        html = await fetch_html(url)
+        content = _parse_post(html) if html else ""
+        if not content:
+            return None
+        return {
+            "link": url,
+            "title": link_obj["title"],
+            "content": content
+        }
+
     async def scrape_multiple_posts(
         self, 
         links: List[Dict[str, str]], 
-        concurrency_limit: int = 5
+        concurrency_limit: int = 5,
+        on_post: Optional[Callable[[Dict[str, str]], Awaitable[None]]] = None
     ) -> List[Dict[str, str]]:
         sem = asyncio.Semaphore(concurrency_limit)
-        async with async_playwright() as p:
-            browser: Browser = await p.chromium.launch(headless=HEADLESS)
-            context: BrowserContext = await browser.new_context(user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-            ))
-
-            async def worker(link_obj: Dict[str, str]) -> Dict[str, str]:
-                async with sem:
-                    page: Page = await context.new_page()
-                    result: Dict[str, str] = await self.scrape_single_post(link_obj, page)
-                    await page.close()
-                    return result
+        http_sem = asyncio.Semaphore(self.http_concurrency_limit)
 
-            tasks: List[Any] = [worker(link) for link in links]
-            results: List[Dict[str, str]] = await asyncio.gather(*tasks)
+        async def worker(link_obj: Dict[str, str]) -> Dict[str, str]:
+            result: Optional[Dict[str, str]] = None
+            if self.fetch_mode == "http":
+                async with http_sem:
+                    result = await self.scrape_single_post_http(link_obj)
+            if result is None:
+                # Browser fallback (or browser mode)
+                async with sem:
+                    async with self.browser_pool.page(self.resource_policy) as page:
+                        result = await self.scrape_single_post(link_obj, page)
+            # Hand each post downstream as soon as it is scraped
+            if on_post and result["content"]:
+                await on_post(result)
+            return result
 
-            await browser.close()
-            return [r for r in results if r["content"]]
\ No newline at end of file
+        tasks: List[Any] = [worker(link) for link in links]
+        results: List[Dict[str, str]] = await asyncio.gather(*tasks)
+        print(f"🧱 Resource blocking: {self.resource_policy.stats()}")
+        return [r for r in results if r["content"]]
\ No newline at end of file
@@ -0,0 +1,73 @@
+# app/scrapers/http_session.py
+import asyncio
+from typing import Optional, Tuple
+
+import aiohttp
+from bs4 import BeautifulSoup, SoupStrainer
+
+from app.scrapers.browser_pool import USER_AGENT
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"  # several times faster than html.parser when installed
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+HTTP_MAX_CONNECTIONS = 64
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=20, connect=5)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def parse_html(html: str, only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """
+    Parse with the fastest available parser. `only` restricts parsing to the
+    elements we actually read.
+    """
+    return BeautifulSoup(html, HTML_PARSER, parse_only=only)
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Process-wide keep-alive session shared by the HTTP scrapers. Recreated if
+    the previous one was closed or belongs to a closed event loop.
+    """
+    global _session
+    if _session is None or _session.closed or _session._loop.is_closed():
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_MAX_CONNECTIONS, ttl_dns_cache=300),
+            timeout=HTTP_TIMEOUT,
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"},
+        )
+    return _session
+
+
+async def fetch(url: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    GET `url` over the shared session. Returns (status, body); body is None
+    unless the status is 200, and both are None on network errors.
+    """
+    try:
+        async with get_http_session().get(url) as resp:
+            if resp.status != 200:
+                print(f"⚠️ HTTP {resp.status} for {url}")
+                return resp.status, None
+            return resp.status, await resp.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"⚠️ HTTP fetch failed for {url}: {e!r}")
+        return None, None
+
+
+async def fetch_html(url: str) -> Optional[str]:
+    """
+    GET `url` over the shared session; None on non-200 or network errors.
+    """
+    _, html = await fetch(url)
+    return html
+
+
+async def close_http_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
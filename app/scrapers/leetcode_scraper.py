@@ -1,14 +1,76 @@
 import asyncio
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
 from bs4 import BeautifulSoup
 import random
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 
 from app.interfaces.scraper_interface import ScraperInterface
+from app.scrapers.browser_pool import BrowserPool, ResourcePolicy, get_browser_pool
+
+
+POST_CONTENT_SELECTOR: str = "div.mYe_l.TAIHK"
+POST_CARD_SELECTOR: str = "div.mt-2.flex.flex-col.gap-4 div.flex-none"
+INTERVIEW_BUTTON_SELECTOR: str = 'button:has-text("Interview")'
 
 
 class LeetCodeScraper(ScraperInterface):
-    HEADLESS: bool = True  # Toggle this
+    """
+    Pages are read as soon as their target selectors render (falling back to
+    network idle), capped by `ready_timeout_ms`, instead of fixed multi-second
+    sleeps. `jitter_seconds` adds a small random pause per page for politeness.
+    """
+
+    def __init__(
+        self,
+        browser_pool: Optional[BrowserPool] = None,
+        ready_timeout_ms: int = 20000,
+        jitter_seconds: tuple[float, float] = (0.2, 1.0),
+        resource_policy: Optional[ResourcePolicy] = None,
+    ):
+        self.browser_pool: BrowserPool = browser_pool or get_browser_pool()
+        # The discuss pages are a client-rendered app: scripts must load, and
+        # stylesheets stay so the Interview tab is clickable (visible) for Playwright.
+        # Images, fonts and media are still blocked, including leetcode.com's own.
+        self.resource_policy: ResourcePolicy = resource_policy or ResourcePolicy(
+            allow_types={"stylesheet"},
+        )
+        self.ready_timeout_ms = ready_timeout_ms
+        self.jitter_seconds = jitter_seconds
+
+    async def _wait_ready(self, page: Page, selector: str) -> bool:
+        """
+        Wait until `selector` is attached, else until the network is idle.
+        Returns True if the selector appeared.
+        """
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=self.ready_timeout_ms)
+            return True
+        except PlaywrightTimeoutError:
+            print(f"⚠️ {selector} not found within {self.ready_timeout_ms} ms, waiting for network idle")
+        try:
+            await page.wait_for_load_state("networkidle", timeout=self.ready_timeout_ms)
+        except PlaywrightTimeoutError:
+            pass
+        return False
+
+    async def _wait_replaced(self, element, old_text: Optional[str], page: Page) -> None:
+        """
+        Wait until `element` is detached or its text changes (the list re-rendered).
+        Raises on timeout so the caller retries instead of reading a stale list.
+        """
+        try:
+            await page.wait_for_function(
+                "([el, text]) => !el.isConnected || el.textContent !== text",
+                arg=[element, old_text],
+                timeout=self.ready_timeout_ms,
+            )
+        except PlaywrightTimeoutError:
+            raise Exception("Interview filter did not re-render the post list")
+
+    async def _jitter(self) -> None:
+        low, high = self.jitter_seconds
+        if high > 0:
+            await asyncio.sleep(random.uniform(low, high))
 
     async def get_links(
         self, company_name: str, max_retries: int = 3, retry_delay: int = 2
@@ -22,46 +84,47 @@ class LeetCodeScraper(ScraperInterface):
         html: Optional[str] = None
         while attempt < max_retries:
             try:
-                async with async_playwright() as p:
-                    browser: Browser = await p.chromium.launch(headless=self.HEADLESS)
-                    page: Page = await browser.new_page(user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-                    ))
-
+                async with self.browser_pool.page(self.resource_policy) as page:
                     url: str = f"https://leetcode.com/discuss/topic/{company_name}/"
                     print(f"🔗 Visiting: {url}")
 
                     try:
                         await page.goto(url, wait_until="domcontentloaded")
                         await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                        delay: int = random.randint(10, 20)
-                        print(f"⏳ Waiting {delay} seconds for page to fully load...")
-                        await page.wait_for_timeout(delay * 1000)
+                        # The tab bar renders once the page is interactive
+                        try:
+                            await page.locator(INTERVIEW_BUTTON_SELECTOR).nth(1).wait_for(
+                                state="attached", timeout=self.ready_timeout_ms
+                            )
+                        except PlaywrightTimeoutError:
+                            pass  # counted and reported below
+                        await self._jitter()
                     except Exception as e:
                         print(f"❌ Failed to load or scroll page: {e}")
-                        await browser.close()
                         raise
 
-                    interview_buttons = page.locator('button:has-text("Interview")')
+                    interview_buttons = page.locator(INTERVIEW_BUTTON_SELECTOR)
                     count: int = await interview_buttons.count()
                     print(f"🧭 Found {count} Interview buttons")
 
                     if count < 2:
                         print("❌ Less than 2 Interview buttons found")
-                        await browser.close()
                         raise Exception("Not enough Interview buttons")
 
                     try:
+                        # The default listing already matches POST_CARD_SELECTOR, so
+                        # wait for the filter to replace it before reading the cards.
+                        old_card = await page.query_selector(POST_CARD_SELECTOR)
+                        old_text = await old_card.text_content() if old_card else None
                         await interview_buttons.nth(1).click()
-                        await page.wait_for_timeout(3000)
+                        if old_card:
+                            await self._wait_replaced(old_card, old_text, page)
+                        await self._wait_ready(page, POST_CARD_SELECTOR)
                         html = await page.content()
                     except Exception as e:
                         print(f"❌ Error during clicking or fetching content: {e}")
-                        await browser.close()
                         raise
 
-                    await browser.close()
                     print("✅ Page content collected")
                     break  # Success, exit retry loop
 
@@ -72,7 +135,7 @@ class LeetCodeScraper(ScraperInterface):
                     print(f"🔄 Retrying in {retry_delay} seconds...")
                     await asyncio.sleep(retry_delay)
                 else:
-                    print(f"❌ Error launching browser or accessing Playwright after {max_retries} attempts.")
+                    print(f"❌ Error loading the topic page after {max_retries} attempts.")
                     return []
 
         if not html:
@@ -117,13 +180,12 @@ class LeetCodeScraper(ScraperInterface):
         try:
             await page.goto(url, wait_until="domcontentloaded")
             await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            delay: int = random.randint(5, 10)
-            print(f"⏳ Waiting {delay} seconds for page to fully load...")
-            await page.wait_for_timeout(delay * 1000)
+            await self._wait_ready(page, POST_CONTENT_SELECTOR)
+            await self._jitter()
             html: str = await page.content()
 
             soup: BeautifulSoup = BeautifulSoup(html, "html.parser")
-            content_div = soup.select_one("div.mYe_l.TAIHK")
+            content_div = soup.select_one(POST_CONTENT_SELECTOR)
             content: str = content_div.get_text(separator="\n", strip=True) if content_div else ""
 
             if not content:
@@ -144,25 +206,23 @@ class LeetCodeScraper(ScraperInterface):
             }
 
     async def scrape_multiple_posts(
-        self, links: List[Dict[str, str]], concurrency_limit: int = 5
+        self,
+        links: List[Dict[str, str]],
+        concurrency_limit: int = 5,
+        on_post: Optional[Callable[[Dict[str, str]], Awaitable[None]]] = None
     ) -> List[Dict[str, str]]:
         sem = asyncio.Semaphore(concurrency_limit)
-        async with async_playwright() as p:
-            browser: Browser = await p.chromium.launch(headless=self.HEADLESS)
-            context: BrowserContext = await browser.new_context(user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-            ))
-
-            async def worker(link_obj: Dict[str, str]) -> Dict[str, str]:
-                async with sem:
-                    page: Page = await context.new_page()
-                    result: Dict[str, str] = await self.scrape_single_post(link_obj, page)
-                    await page.close()
-                    return result
 
-            tasks = [worker(link) for link in links]
-            results: List[Dict[str, str]] = await asyncio.gather(*tasks)
-
-            await browser.close()
-            return [r for r in results if r["content"]]
+        async def worker(link_obj: Dict[str, str]) -> Dict[str, str]:
+            async with sem:
+                async with self.browser_pool.page(self.resource_policy) as page:
+                    result: Dict[str, str] = await self.scrape_single_post(link_obj, page)
+            # Hand each post downstream as soon as it is scraped
+            if on_post and result["content"]:
+                await on_post(result)
+            return result
+
+        tasks = [worker(link) for link in links]
+        results: List[Dict[str, str]] = await asyncio.gather(*tasks)
+        print(f"🧱 Resource blocking: {self.resource_policy.stats()}")
+        return [r for r in results if r["content"]]
@@ -6,11 +6,55 @@ import streamlit as st
 
 # # 👇 Adds the root (leetcode_scraper/) to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from app import main
-import asyncio
 import app.db_functions.company_crud as company_utils
 import app.chat_utils as chat_utils
 import app.agentic_rag as agentic_rag
+from app.background_loop import BackgroundLoop
+from app.db_functions import db_pool, schema
+from app.llm import get_chunks
+from app.llm.llm_client import get_llm_client
+
+COMPANY_LIST_TTL = 60  # seconds
+
+
+# ♻️ Process-wide resources, created once and reused by every rerun and session
+@st.cache_resource
+def get_event_loop():
+    # Long-lived loop so pooled async clients are not torn down after each message
+    return BackgroundLoop()
+
+
+@st.cache_resource
+def get_db_pool():
+    return db_pool.get_pool()
+
+
+@st.cache_resource
+def ensure_schema():
+    # Hybrid search reads summary_tsv, which older databases lack until migrated
+    schema.ensure_schema()
+    return True
+
+
+@st.cache_resource
+def get_llm():
+    return get_llm_client()
+
+
+@st.cache_resource
+def get_tokenizer():
+    return get_chunks.get_tokenizer()
+
+
+@st.cache_data(ttl=COMPANY_LIST_TTL)
+def cached_companies():
+    return company_utils.list_companies()
+
+
+get_event_loop()
+get_db_pool()
+ensure_schema()
+get_llm()
 
 # 🖼️ Page setup
 st.set_page_config(page_title="🧠 RAG Chatbot", layout="wide")
@@ -26,7 +70,7 @@ with st.sidebar:
 
     st.markdown("### 🏢 Company Dashboard")
 
-    companies = company_utils.list_companies()
+    companies = cached_companies()
     if companies:
         for c in companies:
             st.markdown(f"- ✅ **{c[0].title()}**")
@@ -37,7 +81,10 @@ with st.sidebar:
     if st.button("Scrape & Add", key="add_company"):
         if new_company.strip():
             with st.spinner("🔄 Scraping company data..."):
-                output = main.scrape_and_add_company(new_company.strip().lower())
+                from app import main  # lazy: pulls in the scrapers and Playwright
+                get_tokenizer()
+                output = get_event_loop().run(main.scrape_and_add_company_async(new_company.strip().lower()))
+                cached_companies.clear()
                 st.success(f"✅ Added {new_company}")
                 st.text_area("Scraper Output", output, height=200)
             st.rerun()
@@ -69,21 +116,37 @@ if user_input:
     # Reserve space for assistant reply (fresh for each query)
     with st.chat_message("assistant"):
         placeholder = st.empty()
+        status_placeholder = st.empty()  # 👈 judge / refine progress
         debug_placeholder = st.empty()  # 👈 separate space for debug
         time_placeholder = st.empty()   # 👈 separate space for response time
 
-        with st.spinner("🤖 Thinking..."):
-            start = time.time()
-            response, debug = asyncio.run(
-                agentic_rag.agentic_rag(user_input, max_loops=3, top_k=6)
-            )
-            duration = time.time() - start
+        placeholder.markdown("🤖 Thinking...")
+        start = time.time()
+        # Events are produced on the background loop but rendered here, in the
+        # script thread, where Streamlit calls are allowed.
+        text, final = "", None
+        events = agentic_rag.agentic_rag_stream(user_input, max_loops=3, top_k=6, speculative=True)
+        for event in get_event_loop().iterate(events):
+            if event["type"] == "token":
+                text += event["text"]
+                placeholder.markdown(text + "▌")
+            elif event["type"] == "status":
+                status_placeholder.caption(f"🤖 {event['text']}")
+            elif event["type"] == "final":
+                final = event
+        response, debug = final["answer"], final["debug"]
+        duration = time.time() - start
+        status_placeholder.empty()
 
         # Update assistant reply
         placeholder.markdown(response)
 
         # ✅ Clear old debug & time (these placeholders are re-created every new query)
-        time_placeholder.caption(f"🕒 Responded in {duration:.2f} sec")
+        ttft = debug.get("ttft_ms")
+        time_placeholder.caption(
+            f"🕒 Responded in {duration:.2f} sec"
+            + (f" · first token after {ttft / 1000:.2f} sec" if ttft is not None else "")
+        )
 
         with debug_placeholder.expander("🔍 Debug: Retrieved Chunks"):
             st.markdown(debug)